@@ -0,0 +1,255 @@
+# Headless JSON API over the app's data-access functions.
+#
+#   HOSPITAL_API_TOKEN=secret python api.py --port 8080 --workers 10
+#   HOSPITAL_API_TOKEN=secret python api.py --host 0.0.0.0
+#
+# For machine clients (the ADT interface engine, the ER tracking board) that
+# need bed availability and admissions without rendering the Streamlit UI.
+# Each connection gets a lightweight thread, while the number of requests
+# running at once is capped at --workers, so idle keep-alive clients never
+# hold up busy ones. Handlers share the app's connection pool, query cache
+# and bed index, and responses are compact JSON.
+#
+#   GET    /health                       liveness check
+#   GET    /beds/available[?ward=W]      free beds, from the bed index
+#   POST   /assignments                  {"patient_id", "bed_id", "doctor_id"}
+#   DELETE /assignments/<id>             discharge
+#   GET    /search?type=T&q=Q[&limit=N]  T is Patient, Doctor or Bed
+#   GET    /dashboard                    counts and per-ward bed breakdown
+#   GET    /metrics                      Prometheus text format
+#
+# The server refuses to start without HOSPITAL_API_TOKEN, and every request
+# except /health and /metrics must send "Authorization: Bearer <token>".
+import argparse
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import app
+
+# Streamlit warns about missing script contexts when used outside `streamlit run`
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 64 * 1024
+
+# Routes that do not need the bearer token
+PUBLIC_ROUTES = {'health', 'metrics'}
+
+# Raised by handlers to answer with an error status and message
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+# JSON for values the data-access layer returns: datetimes as ISO strings
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'):  # NumPy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def compact_json(payload):
+    return json.dumps(payload, separators=(',', ':'), default=json_default).encode()
+
+def positive_int(value, field):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = 0
+    if number < 1:
+        raise APIError(400, f"{field} must be a positive integer")
+    return number
+
+def health(params, body):
+    return 200, {'status': 'ok'}
+
+def available_beds(params, body):
+    ward = params.get('ward')
+    beds = app.get_available_beds(ward)
+    return 200, {'count': len(beds), 'beds': [{'bed_id': bed['bed_id'], 'ward': bed['ward']} for bed in beds]}
+
+# HTTP status for each kind of failure the data-access functions report
+ERROR_STATUS = {
+    'invalid': 422,
+    'not_found': 404,
+    'conflict': 409,
+    'unavailable': 503,
+    'database': 500
+}
+
+def raise_for_error(result):
+    if result['error']:
+        raise APIError(ERROR_STATUS.get(result['error_kind'], 500), result['error'])
+
+# Admit a patient; the bed claim is atomic, so a lost race answers 409
+def create_assignment(params, body):
+    if not isinstance(body, dict):
+        raise APIError(400, "Expected a JSON object")
+    patient_id, bed_id, doctor_id = (positive_int(body.get(field), field)
+                                     for field in ('patient_id', 'bed_id', 'doctor_id'))
+    result = app.admit_patient(patient_id, bed_id, doctor_id)
+    raise_for_error(result)
+    return 201, {'assignment_id': result['assignment_id'], 'bed_id': bed_id, 'patient_id': patient_id}
+
+def delete_assignment(params, body, assignment_id):
+    assignment_id = positive_int(assignment_id, 'assignment_id')
+    report = app.discharge_assignments([assignment_id])
+    raise_for_error(report)
+    if report['skipped']:
+        raise APIError(404, report['skipped'][0]['reason'])
+    return 200, {'discharged': assignment_id}
+
+def search(params, body):
+    search_type = params.get('type', '')
+    if search_type not in app.SEARCH_SPECS:
+        raise APIError(400, f"type must be one of: {', '.join(app.SEARCH_SPECS)}")
+    limit = min(positive_int(params.get('limit', app.SEARCH_RESULT_LIMIT), 'limit'), app.SEARCH_RESULT_LIMIT)
+    results = app.search_data(search_type, params.get('q', ''), limit)
+    rows = results.astype(object).where(results.notna(), None).to_dict('records')
+    return 200, {'count': len(rows), 'results': rows}
+
+def dashboard(params, body):
+    try:
+        return 200, app.get_dashboard_metrics()
+    except app.mysql.connector.Error as err:
+        raise APIError(503, f"Error: {err}")
+
+# (method, path pattern, route name, handler); path groups become arguments
+ROUTES = [
+    ('GET', r'/health', 'health', health),
+    ('GET', r'/beds/available', 'available_beds', available_beds),
+    ('POST', r'/assignments', 'create_assignment', create_assignment),
+    ('DELETE', r'/assignments/(\d+)', 'delete_assignment', delete_assignment),
+    ('GET', r'/search', 'search', search),
+    ('GET', r'/dashboard', 'dashboard', dashboard)
+]
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients skip a TCP handshake per call
+    timeout = 30                   # idle keep-alive connections are closed after this
+    token = None
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def dispatch(self, method):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        route = 'unmatched'
+        try:
+            if url.path == '/metrics' and method == 'GET':
+                route = 'metrics'
+                self.send(200, app.get_metrics().render_prometheus().encode(), 'text/plain; version=0.0.4')
+                return
+            body = self.read_body()  # consumed first so keep-alive survives an early error
+            handler, args, route = self.match(method, url.path)
+            if route not in PUBLIC_ROUTES:
+                self.authorize()
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            with self.server.request_slots:
+                status, payload = handler(params, body, *args)
+            self.send(status, compact_json(payload))
+        except APIError as err:
+            self.send(err.status, compact_json({'error': err.message}))
+        except Exception as err:  # keep serving; the client gets a 500
+            logging.getLogger('hospital').exception("API request %s %s failed", method, url.path)
+            self.send(500, compact_json({'error': f"Internal error: {err}"}))
+        finally:
+            app.get_metrics().observe('api', route, time.perf_counter() - started)
+
+    def match(self, method, path):
+        allowed = False
+        for route_method, pattern, name, handler in ROUTES:
+            found = re.fullmatch(pattern, path)
+            if found:
+                if route_method == method:
+                    return handler, found.groups(), name
+                allowed = True
+        raise APIError(405 if allowed else 404, "Method not allowed" if allowed else "Not found")
+
+    def authorize(self):
+        header = self.headers.get('Authorization', '')
+        if not hmac.compare_digest(header.encode(), f"Bearer {self.token}".encode()):
+            raise APIError(401, "Missing or invalid bearer token")
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise APIError(413, "Request body too large")
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise APIError(400, "Request body is not valid JSON")
+
+    def send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Per-request access logs would dominate at API request rates
+    def log_message(self, format, *args):
+        pass
+
+# HTTP server with a thread per connection, so a connection waiting for its
+# next request costs a parked thread rather than a worker. Handlers run under
+# a semaphore of `workers` slots, so concurrent work cannot outgrow the
+# connection pool.
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, handler, workers):
+        super().__init__(address, handler)
+        self.request_slots = threading.BoundedSemaphore(workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the hospital data-access API as JSON over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=app.DB_POOL_CONFIG['pool_size'],
+                        help="requests running at once (default: the connection pool size)")
+    args = parser.parse_args()
+
+    # Search returns patient details and the API can admit and discharge, so
+    # there is no unauthenticated mode, not even on loopback
+    APIHandler.token = os.environ.get('HOSPITAL_API_TOKEN')
+    if not APIHandler.token:
+        sys.exit("Set HOSPITAL_API_TOKEN to the bearer token clients must send")
+
+    app.ensure_schema()
+    app.get_metrics()
+    app.get_bed_index()  # load the index before the first request needs it
+
+    server = APIServer((args.host, args.port), APIHandler, args.workers)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
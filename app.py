@@ -1,8 +1,24 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import mysql.connector
+import csv
+import gzip
+import bisect
+import functools
 import hashlib
+import heapq
+import io
+import logging
+import os
 import re
-from datetime import datetime
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
 # MySQL configuration
@@ -13,27 +29,805 @@ DB_CONFIG = {
     'database': 'hospital_db'
 }
 
+# Connection pool settings
+DB_POOL_CONFIG = {
+    'pool_size': 10,            # maximum number of open connections per process
+    'checkout_timeout': 5,      # seconds to wait for a free connection
+    'max_lifetime': 1800,       # recycle connections older than this many seconds
+    'health_check_idle': 30     # ping connections idle longer than this before reuse
+}
+
+# Read replicas of the primary, each given as overrides of DB_CONFIG
+# (typically host and port), e.g. [{'host': 'replica1'}, {'host': 'replica2', 'port': 3307}].
+# Empty sends every query to the primary.
+DB_REPLICAS = []
+
+# Replica routing: replicas more than max_lag seconds behind the primary are
+# skipped, and each replica's lag is re-measured at most every
+# lag_check_interval seconds
+REPLICA_CONFIG = {
+    'max_lag': 5,
+    'lag_check_interval': 2
+}
+
+# Read-through query cache: default entry lifetime in seconds and maximum
+# number of cached results before least recently used entries are evicted
+QUERY_CACHE_CONFIG = {
+    'ttl': 30,
+    'max_entries': 256
+}
+
+# Seconds before the bed index catches up from the change feed again (None
+# disables); a full reload only happens when the feed cannot bridge the gap
+BED_INDEX_SYNC_SECONDS = 5
+
+# Housekeeping priority: a dirty bed in a ward with no free beds ranks as if
+# it had waited full_ward_bonus_hours longer (half that with one free bed,
+# and so on); turnover metrics cover the last metrics_days days
+HOUSEKEEPING_CONFIG = {
+    'full_ward_bonus_hours': 4,
+    'metrics_days': 7
+}
+
+# Change-feed events read per poll; a client further behind reloads in full
+BED_FEED_BATCH_SIZE = 1000
+
+# Bed change feed: events are numbered by AUTO_INCREMENT, so a version can be
+# allocated but committed after later ones, or never (rolled back). Readers
+# wait gap_grace_seconds for a missing version before treating it as rolled
+# back. The newest retain_events events are kept; readers behind those reload.
+BED_FEED_CONFIG = {
+    'gap_grace_seconds': 30,
+    'retain_events': 100000,
+    'prune_batch_size': 10000
+}
+
+# Seconds the occupancy analytics stay cached
+OCCUPANCY_CACHE_SECONDS = 300
+
+# Admission forecasting: days of history used, the exponential smoothing
+# factor for the daily level (higher follows recent days more closely) and
+# seconds a forecast stays cached
+FORECAST_CONFIG = {
+    'history_days': 730,
+    'smoothing': 0.1,
+    'cache_seconds': 900
+}
+
+# Seconds between bed board refreshes
+BED_BOARD_POLL_SECONDS = 5
+
+# Bed states accepted by the beds table
+BED_STATUSES = ['available', 'occupied', 'maintenance', 'cleaning']
+
+# States a new bed may start in; occupancy and cleaning follow admissions and
+# discharges
+NEW_BED_STATUSES = ['available', 'maintenance']
+
+# Rows per multi-row INSERT (and per transaction) in bulk imports
+IMPORT_BATCH_SIZE = 1000
+
+# Per-row errors kept in a bulk import report; further failures are only counted
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Discharge archival: a finished stay moves to assignment_history at discharge,
+# in the discharge transaction itself; patients discharged more than
+# retention_days ago move to patient_history (and back into patients if they
+# are readmitted) in transactions of batch_size; the background archiver
+# runs every interval seconds and keeps monthly history partitions created
+# partition_months_ahead months in advance
+ARCHIVE_CONFIG = {
+    'retention_days': 30,
+    'batch_size': 500,
+    'interval': 300,
+    'partition_months_ahead': 3
+}
+
+# Rows fetched per round trip, and per Parquet row group, when exporting
+EXPORT_CHUNK_SIZE = 10000
+
+# Largest export file offered for download from the Export page, in bytes.
+# Streamlit holds a download in memory while serving it, so bigger extracts
+# must be written with export_data.py.
+EXPORT_DOWNLOAD_MAX_BYTES = 200 * 2 ** 20
+
+# Maximum rows returned by search_data
+SEARCH_RESULT_LIMIT = 50
+
+# Words shorter than InnoDB's innodb_ft_min_token_size are not in the
+# full-text index; such searches use B-tree prefix matching instead
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+# Options offered by each typeahead selector on the Assignments form
+TYPEAHEAD_LIMIT = 20
+
+# Rows per page on the list pages
+PAGE_SIZE = 25
+
+# Rows fetched per round trip when reading results straight into DataFrames
+FRAME_CHUNK_SIZE = 10000
+
+# Most admissions accepted by one batch allocation
+ALLOCATION_MAX_BATCH = 5000
+
+# Times a batch allocation re-plans admissions whose planned bed was taken by
+# a concurrent admission before it could be locked
+ALLOCATION_CLAIM_ROUNDS = 3
+
 # Constant passkey for all users
 CONSTANT_PASSKEY = "PASS12"
 
-# Function to connect to MySQL
-def get_db_connection():
+# Instrumentation: latency histogram bucket bounds in seconds, the slow-query
+# threshold and log file, whether slow queries are recorded with their
+# parameter values (these hold patient names and contacts, so only enable it
+# on test data; statements on users are redacted regardless), how many slow queries the diagnostics page
+# keeps, and the Prometheus text file rewritten every metrics_file_interval
+# seconds (None disables it)
+INSTRUMENTATION_CONFIG = {
+    'buckets': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'slow_query_seconds': 0.5,
+    'slow_query_log': 'slow_queries.log',
+    'slow_query_params': False,
+    'recent_slow_queries': 100,
+    'metrics_file': 'metrics.prom',
+    'metrics_file_interval': 15
+}
+
+# Callables notified after every statement run on a pooled connection, as
+# observer(statement, params, seconds, name) where name is the function that
+# ran it. Kept as a resource so the list survives Streamlit reruns.
+@st.cache_resource
+def _query_observers():
+    return []
+
+QUERY_OBSERVERS = _query_observers()
+
+# Name a query after the function that executed it
+def query_name(frame):
+    return getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+
+# Cursor wrapper that reports each executed statement to QUERY_OBSERVERS
+class ObservedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, statement, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(statement, params, *args, **kwargs)
+        finally:
+            self._notify(statement, params, time.perf_counter() - started, query_name(sys._getframe(1)))
+
+    def executemany(self, statement, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(statement, seq_params, *args, **kwargs)
+        finally:
+            self._notify(statement, None, time.perf_counter() - started, query_name(sys._getframe(1)))
+
+    @staticmethod
+    def _notify(statement, params, seconds, name):
+        for observer in list(QUERY_OBSERVERS):
+            observer(statement, params, seconds, name)
+
+# Connection borrowed from the pool; close() hands it back instead of disconnecting
+class PooledConnection:
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise mysql.connector.errors.OperationalError("Connection has already been returned to the pool")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.__getattr__('cursor')(*args, **kwargs)
+        return ObservedCursor(cursor) if QUERY_OBSERVERS else cursor
+
+    def __del__(self):
+        # Safety net for helpers that raise before reaching close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, self._created_at)
+
+# Thread-safe pool of MySQL connections shared by every session in the process
+class ConnectionPool:
+    def __init__(self, db_config, pool_size=10, checkout_timeout=5, max_lifetime=1800, health_check_idle=30):
+        self.db_config = dict(db_config)
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self._idle = []  # (connection, created_at, last_used), most recently used last
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        conn = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    break
+                if self._open < self.pool_size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise mysql.connector.errors.PoolError(
+                        f"Timed out after {self.checkout_timeout}s waiting for a database connection")
+                self._cond.wait(remaining)
+
+        # Recycle stale connections and health-check idle ones outside the lock
+        if conn is not None:
+            now = time.monotonic()
+            if now - created_at > self.max_lifetime:
+                self._disconnect(conn)
+                conn = None
+            elif now - last_used > self.health_check_idle and not self._is_alive(conn):
+                self._disconnect(conn)
+                conn = None
+
+        if conn is None:
+            try:
+                conn = mysql.connector.connect(**self.db_config)
+            except mysql.connector.Error:
+                self._forget()
+                raise
+            created_at = time.monotonic()
+        return PooledConnection(self, conn, created_at)
+
+    def release(self, conn, created_at):
+        # Never hand out a connection with a half-finished transaction
+        try:
+            conn.rollback()
+        except mysql.connector.Error:
+            self._disconnect(conn)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._disconnect(conn)
+
+    def stats(self):
+        with self._cond:
+            return {'open': self._open, 'idle': len(self._idle), 'in_use': self._open - len(self._idle),
+                    'pool_size': self.pool_size}
+
+    def _forget(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_alive(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    @staticmethod
+    def _disconnect(conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+# One pool per server process, shared across Streamlit sessions and reruns
+@st.cache_resource
+def get_connection_pool():
+    return ConnectionPool(DB_CONFIG, **DB_POOL_CONFIG)
+
+# Connection pools for the read replicas, with lag-aware routing between them.
+# Replicas serve a read only once they have applied this process's latest
+# write, which gives every session read-your-writes: writers call
+# note_write() (through invalidate_cache) after committing. With GTIDs on,
+# note_write() records the primary's executed GTID set and a replica must
+# contain it; without them a replica must have been measured in sync after
+# the write.
+class ReplicaSet:
+    def __init__(self, replicas, pool_config, max_lag=5, lag_check_interval=2):
+        self.pools = [ConnectionPool(dict(DB_CONFIG, **replica), **pool_config) for replica in replicas]
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.last_write = None
+        self.last_write_gtids = None
+        self._lag = [(None, None)] * len(self.pools)  # (seconds behind or None, measured_at)
+        self._applied = [None] * len(self.pools)      # last write GTID set each replica was seen to contain
+        self._next = 0
+        self._lock = threading.Lock()
+        self.routed = Counter()  # 'replica' / 'primary' -> reads routed there
+
+    def note_write(self):
+        self.last_write_gtids = self._primary_gtids()
+        self.last_write = time.monotonic()
+
+    # Borrow a connection from the next replica, round robin, that is close
+    # enough behind and has applied the latest write; None when no replica
+    # qualifies and the read must go to the primary
+    def acquire(self):
+        now = time.monotonic()
+        gtids = self.last_write_gtids
+        allowed = self.max_lag
+        if self.last_write is not None and gtids is None:
+            # Lag is reported in whole seconds (and reads 0 while the IO
+            # thread is behind), hence the extra second
+            allowed = min(allowed, now - self.last_write - 1)
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.pools)
+        for offset in range(len(self.pools) if allowed >= 0 else 0):
+            i = (start + offset) % len(self.pools)
+            lag, measured_at = self._lag[i]
+            # A reading taken before the latest write says nothing about it
+            fresh = (measured_at is not None and now - measured_at < self.lag_check_interval
+                     and (self.last_write is None or measured_at > self.last_write))
+            if fresh and (lag is None or lag > allowed):
+                continue
+            try:
+                conn = self.pools[i].acquire()
+            except mysql.connector.Error:
+                self._lag[i] = (None, now)
+                continue
+            if not fresh:
+                lag = self._measure_lag(conn)
+                self._lag[i] = (lag, now)
+                if lag is None or lag > allowed:
+                    conn.close()
+                    continue
+            if gtids is not None and not self._has_applied(i, conn, gtids):
+                conn.close()
+                continue
+            self.routed['replica'] += 1
+            return conn
+        self.routed['primary'] += 1
+        return None
+
+    # Whether replica i has executed every transaction in `gtids`; remembered
+    # until the next write
+    def _has_applied(self, i, conn, gtids):
+        if self._applied[i] == gtids:
+            return True
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT GTID_SUBSET(%s, @@GLOBAL.gtid_executed)', (gtids,))
+            applied = bool(cursor.fetchone()[0])
+        except mysql.connector.Error:
+            return False
+        finally:
+            cursor.close()
+        if applied:
+            self._applied[i] = gtids
+        return applied
+
+    # GTID set executed on the primary, or None if GTIDs are off or unreadable
+    @staticmethod
+    def _primary_gtids():
+        try:
+            conn = get_connection_pool().acquire()
+        except mysql.connector.Error:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT @@GLOBAL.gtid_executed')
+            return cursor.fetchone()[0] or None
+        except mysql.connector.Error:
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        return {
+            'replicas': [
+                dict(pool.stats(), host=pool.db_config.get('host'), port=pool.db_config.get('port'), lag=lag)
+                for pool, (lag, _) in zip(self.pools, self._lag)
+            ],
+            'routed': dict(self.routed)
+        }
+
+    # Seconds the replica is behind its source, or None if it is not
+    # replicating (or the lag cannot be read)
+    @staticmethod
+    def _measure_lag(conn):
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute('SHOW REPLICA STATUS')
+            except mysql.connector.Error:
+                cursor.execute('SHOW SLAVE STATUS')  # servers before 8.0.22
+            rows = cursor.fetchall()
+        except mysql.connector.Error:
+            return None
+        finally:
+            cursor.close()
+        lags = [row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master')) for row in rows]
+        if not lags or None in lags:
+            return None
+        return max(lags)
+
+@st.cache_resource
+def get_replica_set():
+    return ReplicaSet(DB_REPLICAS, DB_POOL_CONFIG, **REPLICA_CONFIG)
+
+# Failed connection attempts per thread, so cached_query can tell a query's
+# empty fallback from a real result
+_connection_failures = threading.local()
+
+def connection_failures():
+    return getattr(_connection_failures, 'count', 0)
+
+# Function to borrow a pooled MySQL connection; close() returns it to the pool.
+# Read-only helpers pass read_only=True to use a replica when one is in sync.
+def get_db_connection(read_only=False):
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        if read_only and DB_REPLICAS:
+            conn = get_replica_set().acquire()
+            if conn is not None:
+                return conn
+        return get_connection_pool().acquire()
     except mysql.connector.Error as err:
+        _connection_failures.count = connection_failures() + 1
         st.error(f"Error connecting to database: {err}")
         return None
 
-# Initialize database and tables
-def init_db():
-    conn = get_db_connection()
-    if not conn:
-        return
-    cursor = conn.cursor()
-    
-    # Updated users table with passkey, security_question, and security_answer
-    # Set a default constant passkey
-    cursor.execute('''
+# Worker threads that run blocking data-access calls side by side. Sized to the
+# connection pool so concurrent calls never wait on each other for a connection.
+@st.cache_resource
+def get_query_executor():
+    return ThreadPoolExecutor(max_workers=DB_POOL_CONFIG['pool_size'], thread_name_prefix='query')
+
+# Run independent data-access calls concurrently and return their results in
+# order, so a page waits for its slowest query rather than the sum of them.
+# Only worth it for calls that each spend real time in the database. Calls
+# take no arguments (use functools.partial) and must not nest. Workers run
+# under the caller's script context, so st.* calls and session state inside
+# them reach the right session.
+def run_concurrently(*calls):
+    if len(calls) < 2:
+        return [call() for call in calls]
+    ctx = get_script_run_ctx()
+
+    def run(call):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            return call()
+        finally:
+            add_script_run_ctx(threading.current_thread(), None)
+
+    futures = [get_query_executor().submit(run, call) for call in calls]
+    return [future.result() for future in futures]
+
+# Call a data-access function, returning (result, None) or (None, the
+# database error), so several can share one run_concurrently() call
+def result_or_error(func):
+    try:
+        return func(), None
+    except mysql.connector.Error as err:
+        return None, err
+
+# Process-wide read-through cache for query results. Entries are tagged with
+# the tables they read so that writers invalidate exactly what they touched.
+# Cached values are shared between sessions and must be treated as read-only.
+# Every invalidation bumps a generation per table (or a global one), and a
+# result is only stored if no table it read was invalidated while it ran.
+class QueryCache:
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value), oldest first
+        self._counters = {}            # function name -> {'hits': n, 'misses': n}
+        self._generations = Counter()  # table -> invalidations so far
+        self._epoch = 0                # full clears so far
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Token for put(): taken before running the query it will store
+    def generation(self, tables):
+        with self._lock:
+            return self._epoch, tuple(self._generations[table] for table in tables)
+
+    def get(self, key):
+        with self._lock:
+            counters = self._counters.setdefault(key[0], {'hits': 0, 'misses': 0})
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                counters['hits'] += 1
+                return True, entry[2]
+            if entry:
+                del self._entries[key]
+            counters['misses'] += 1
+            return False, None
+
+    def put(self, key, tables, value, ttl=None, generation=None):
+        with self._lock:
+            if generation is not None and generation != (self._epoch, tuple(self._generations[t] for t in tables)):
+                return  # invalidated while the query ran; the value may be stale
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Drop every entry that read any of `tables`; no tables clears everything
+    def invalidate(self, *tables):
+        with self._lock:
+            if not tables:
+                self._epoch += 1
+                stale = list(self._entries)
+            else:
+                self._generations.update(tables)
+                stale = [key for key, entry in self._entries.items() if entry[1].intersection(tables)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            hits = sum(c['hits'] for c in self._counters.values())
+            misses = sum(c['misses'] for c in self._counters.values())
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'functions': {name: dict(c) for name, c in self._counters.items()}
+            }
+
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(**QUERY_CACHE_CONFIG)
+
+# Make arguments hashable so they can form part of a cache key
+def freeze_cache_key(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze_cache_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_cache_key(v) for v in value)
+    return value
+
+# Decorator: serve a query function through the shared cache, tagging its
+# results with the tables it reads. `func.uncached` bypasses the cache.
+# Results built while a connection could not be had (the empty fallbacks
+# most query functions return) are passed through but never stored.
+def cached_query(*tables, ttl=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_query_cache()
+            key = (func.__name__, freeze_cache_key(args), freeze_cache_key(kwargs))
+            found, value = cache.get(key)
+            if found:
+                return value
+            generation = cache.generation(tables)
+            failures = connection_failures()
+            value = func(*args, **kwargs)
+            if connection_failures() == failures:
+                cache.put(key, tables, value, ttl, generation)
+            return value
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+# Invalidate cached results that read any of `tables` (all of them if none
+# given). Writers call this after committing, which also keeps reads on the
+# primary until the replicas have caught up with the write.
+def invalidate_cache(*tables):
+    if DB_REPLICAS:
+        get_replica_set().note_write()
+    get_query_cache().invalidate(*tables)
+
+# Cumulative latency histogram per (kind, name) in Prometheus form, plus the
+# slow-query log. Kinds are 'query' (named after the executing function) and
+# 'page' (one observation per script run).
+class Metrics:
+    def __init__(self, buckets, slow_query_seconds, slow_query_log=None, slow_query_params=False,
+                 recent_slow_queries=100, **_):
+        self.buckets = tuple(buckets)
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_query_params = slow_query_params
+        self._lock = threading.Lock()
+        self._histograms = {}  # (kind, name) -> [bucket counts..., +Inf count, sum]
+        self._slow = deque(maxlen=recent_slow_queries)
+        self.slow_query_count = 0
+        self._slow_log = logging.getLogger('hospital.slow_queries')
+        if slow_query_log and not self._slow_log.handlers:
+            handler = logging.FileHandler(slow_query_log)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._slow_log.addHandler(handler)
+            self._slow_log.setLevel(logging.INFO)
+            self._slow_log.propagate = False
+
+    def observe(self, kind, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = [0] * (len(self.buckets) + 2)
+            histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram[-1] += seconds
+
+    # QUERY_OBSERVERS hook: time the statement and log it if slow. Parameters
+    # of statements on the users table (credentials) are never logged, even
+    # with slow_query_params on.
+    def observe_query(self, statement, params, seconds, name):
+        self.observe('query', name, seconds)
+        if seconds < self.slow_query_seconds:
+            return
+        statement = ' '.join(statement.split())
+        if self.slow_query_params and not re.search(r'\busers\b', statement, re.I):
+            params = repr(params)
+        else:
+            params = f"<{len(params or ())} redacted>"
+        entry = {'at': datetime.now(), 'query': name, 'ms': round(seconds * 1000, 1),
+                 'statement': statement, 'params': params}
+        with self._lock:
+            self._slow.append(entry)
+            self.slow_query_count += 1
+        self._slow_log.info("%.1fms %s: %s params=%s", entry['ms'], name, statement, entry['params'])
+
+    # Per (kind, name): count, mean and bucket-estimated p50/p95 in ms
+    def summary(self, kind):
+        with self._lock:
+            histograms = {name: list(h) for (k, name), h in self._histograms.items() if k == kind}
+        rows = []
+        for name, histogram in sorted(histograms.items()):
+            count = sum(histogram[:-1])
+            rows.append({'name': name, 'count': count,
+                         'mean_ms': round(histogram[-1] / count * 1000, 2),
+                         'p50_ms': self._quantile_ms(histogram, count, 0.5),
+                         'p95_ms': self._quantile_ms(histogram, count, 0.95)})
+        return rows
+
+    def slow_queries(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    # Prometheus text exposition format, including pool and cache gauges
+    def render_prometheus(self):
+        with self._lock:
+            histograms = {key: list(h) for key, h in self._histograms.items()}
+            slow_count = self.slow_query_count
+        lines = []
+        for kind, metric, label, help_text in (
+            ('query', 'hospital_query_duration_seconds', 'query', "Time spent executing SQL statements"),
+            ('page', 'hospital_page_render_seconds', 'page', "Time spent rendering a page"),
+            ('api', 'hospital_api_request_seconds', 'route', "Time spent serving API requests")
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for (k, name), histogram in sorted(histograms.items()):
+                if k != kind:
+                    continue
+                labels = f'{label}="{prometheus_escape(name)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), histogram[:-1]):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{labels}}} {histogram[-1]:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {cumulative}')
+        lines += ["# HELP hospital_slow_queries_total Statements slower than the slow-query threshold",
+                  "# TYPE hospital_slow_queries_total counter",
+                  f"hospital_slow_queries_total {slow_count}"]
+
+        pools = {'primary': get_connection_pool().stats()}
+        if DB_REPLICAS:
+            for i, replica in enumerate(get_replica_set().stats()['replicas']):
+                pools[f'replica{i}'] = replica
+        lines += ["# HELP hospital_db_pool_connections Pooled database connections by state",
+                  "# TYPE hospital_db_pool_connections gauge"]
+        for pool, stats in pools.items():
+            for state in ('open', 'idle', 'in_use'):
+                lines.append(f'hospital_db_pool_connections{{pool="{pool}",state="{state}"}} {stats[state]}')
+
+        cache = get_query_cache().stats()
+        lines += ["# HELP hospital_query_cache_requests_total Query cache lookups by result",
+                  "# TYPE hospital_query_cache_requests_total counter",
+                  f'hospital_query_cache_requests_total{{result="hit"}} {cache["hits"]}',
+                  f'hospital_query_cache_requests_total{{result="miss"}} {cache["misses"]}',
+                  "# HELP hospital_query_cache_entries Results held in the query cache",
+                  "# TYPE hospital_query_cache_entries gauge",
+                  f"hospital_query_cache_entries {cache['entries']}"]
+        return '\n'.join(lines) + '\n'
+
+    def _quantile_ms(self, histogram, count, quantile):
+        cumulative = 0
+        for bound, bucket in zip(self.buckets, histogram):
+            cumulative += bucket
+            if cumulative >= quantile * count:
+                return bound * 1000
+        return None  # beyond the largest bucket
+
+def prometheus_escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Write the Prometheus text file atomically, for node_exporter's textfile collector
+def write_metrics_file(metrics, path):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(metrics.render_prometheus())
+    os.replace(temp_path, path)
+
+# Process-wide metrics, hooked into every pooled query. Also starts the thread
+# that keeps the Prometheus text file current.
+@st.cache_resource
+def get_metrics():
+    metrics = Metrics(**INSTRUMENTATION_CONFIG)
+    QUERY_OBSERVERS.append(metrics.observe_query)
+    path = INSTRUMENTATION_CONFIG.get('metrics_file')
+    if path:
+        def export():
+            while True:
+                time.sleep(INSTRUMENTATION_CONFIG['metrics_file_interval'])
+                try:
+                    write_metrics_file(metrics, path)
+                except Exception as err:  # keep exporting after transient failures
+                    logging.getLogger('hospital').warning("Could not write %s: %s", path, err)
+        threading.Thread(target=export, name='metrics-export', daemon=True).start()
+    return metrics
+
+# Migration step that runs `statement` only when the information_schema
+# `check` (a COUNT query) finds the object in the state `run_if_found`. MySQL
+# commits every DDL statement on its own, so a migration that fails part way
+# has already applied its earlier steps; guarded steps let it be re-run.
+GuardedStep = namedtuple('GuardedStep', ['check', 'params', 'statement', 'run_if_found'])
+
+def if_column_missing(table, column, statement):
+    return GuardedStep('''
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    ''', (table, column), statement, False)
+
+def if_index_missing(table, index, statement):
+    return GuardedStep('''
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    ''', (table, index), statement, False)
+
+def if_index_exists(table, index, statement):
+    return if_index_missing(table, index, statement)._replace(run_if_found=True)
+
+# Ordered schema migrations: (version, description, steps). Each step is SQL
+# that is safe to repeat (CREATE TABLE IF NOT EXISTS, INSERT IGNORE, ...) or a
+# GuardedStep. Append new entries to change the schema; never change what a
+# shipped one does.
+MIGRATIONS = [
+    (1, "Initial schema", [
+        # Users table with passkey, security_question, and security_answer
+        '''
         CREATE TABLE IF NOT EXISTS users (
             id INT AUTO_INCREMENT PRIMARY KEY,
             name VARCHAR(100) NOT NULL,
@@ -43,10 +837,8 @@ def init_db():
             security_question VARCHAR(255) NOT NULL,
             security_answer VARCHAR(255) NOT NULL
         )
-    ''')
-
-    # Create patients table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS patients (
             patient_id INT AUTO_INCREMENT PRIMARY KEY,
             name VARCHAR(100) NOT NULL,
@@ -55,30 +847,24 @@ def init_db():
             contact VARCHAR(15),
             admission_date DATETIME
         )
-    ''')
-
-    # Create doctors table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS doctors (
             doctor_id INT AUTO_INCREMENT PRIMARY KEY,
             name VARCHAR(100) NOT NULL,
             specialty VARCHAR(100) NOT NULL,
             contact VARCHAR(15)
         )
-    ''')
-
-    # Create beds table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS beds (
             bed_id INT AUTO_INCREMENT PRIMARY KEY,
             ward VARCHAR(50) NOT NULL,
             status ENUM('available', 'occupied', 'maintenance') NOT NULL,
             last_cleaned DATETIME
         )
-    ''')
-
-    # Create assignments table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS assignments (
             assignment_id INT AUTO_INCREMENT PRIMARY KEY,
             patient_id INT,
@@ -89,11 +875,237 @@ def init_db():
             FOREIGN KEY (bed_id) REFERENCES beds(bed_id),
             FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id)
         )
-    ''')
+        '''
+    ]),
+    (2, "Full-text and prefix search indexes", [
+        if_index_missing('patients', 'ft_patients_name',
+                         'ALTER TABLE patients ADD FULLTEXT INDEX ft_patients_name (name)'),
+        if_index_missing('doctors', 'ft_doctors_name_specialty',
+                         'ALTER TABLE doctors ADD FULLTEXT INDEX ft_doctors_name_specialty (name, specialty)'),
+        if_index_missing('beds', 'ft_beds_ward',
+                         'ALTER TABLE beds ADD FULLTEXT INDEX ft_beds_ward (ward)'),
+        if_index_missing('patients', 'idx_patients_name',
+                         'CREATE INDEX idx_patients_name ON patients (name)'),
+        if_index_missing('doctors', 'idx_doctors_name',
+                         'CREATE INDEX idx_doctors_name ON doctors (name)'),
+        if_index_missing('doctors', 'idx_doctors_specialty',
+                         'CREATE INDEX idx_doctors_specialty ON doctors (specialty)'),
+        if_index_missing('beds', 'idx_beds_ward', 'CREATE INDEX idx_beds_ward ON beds (ward)')
+    ]),
+    (3, "Secondary indexes for list, filter and dashboard queries", [
+        # (status, ward) serves status filters and the available-beds lookup;
+        # (ward, status) serves ward filters and covers the dashboard GROUP BY
+        if_index_missing('beds', 'idx_beds_status_ward',
+                         'CREATE INDEX idx_beds_status_ward ON beds (status, ward)'),
+        if_index_missing('beds', 'idx_beds_ward_status',
+                         'CREATE INDEX idx_beds_ward_status ON beds (ward, status)'),
+        if_index_exists('beds', 'idx_beds_ward', 'DROP INDEX idx_beds_ward ON beds'),
+        if_index_missing('patients', 'idx_patients_age',
+                         'CREATE INDEX idx_patients_age ON patients (age)'),
+        if_index_missing('assignments', 'idx_assignments_date',
+                         'CREATE INDEX idx_assignments_date ON assignments (assignment_date)')
+    ]),
+    (4, "Bed change feed", [
+        # One row per bed change carrying the bed's state after the change.
+        # Versions come from AUTO_INCREMENT, so writers share no counter row;
+        # created_at serves the feed's grace window and pruning.
+        '''
+        CREATE TABLE IF NOT EXISTS bed_events (
+            version BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            bed_id INT NOT NULL,
+            event_type ENUM('added', 'updated', 'deleted') NOT NULL,
+            ward VARCHAR(50),
+            status VARCHAR(20),
+            last_cleaned DATETIME,
+            created_at DATETIME NOT NULL,
+            INDEX idx_bed_events_created (created_at)
+        )
+        '''
+    ]),
+    (5, "Occupancy history and hourly rollups", [
+        # Append-only admission/discharge history; never updated or deleted
+        '''
+        CREATE TABLE IF NOT EXISTS occupancy_events (
+            event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            event_type ENUM('admission', 'discharge') NOT NULL,
+            assignment_id INT NOT NULL,
+            patient_id INT,
+            bed_id INT,
+            ward VARCHAR(50) NOT NULL,
+            event_time DATETIME NOT NULL,
+            stay_seconds INT,
+            INDEX idx_occupancy_events_time (event_time),
+            INDEX idx_occupancy_events_assignment (assignment_id)
+        )
+        ''',
+        # Per ward and hour: event counts, total stay of the hour's discharges
+        # and the ward's occupancy at the end of the hour. Only hours with
+        # events have rows; readers carry occupancy forward between them.
+        '''
+        CREATE TABLE IF NOT EXISTS occupancy_hourly (
+            ward VARCHAR(50) NOT NULL,
+            hour_start DATETIME NOT NULL,
+            admissions INT NOT NULL DEFAULT 0,
+            discharges INT NOT NULL DEFAULT 0,
+            stay_seconds BIGINT NOT NULL DEFAULT 0,
+            occupied INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (ward, hour_start),
+            INDEX idx_occupancy_hourly_hour (hour_start)
+        )
+        ''',
+        # Existing assignments become admissions at their assignment date
+        '''
+        INSERT INTO occupancy_events (event_type, assignment_id, patient_id, bed_id, ward, event_time)
+        SELECT 'admission', a.assignment_id, a.patient_id, a.bed_id, b.ward, COALESCE(a.assignment_date, NOW())
+        FROM assignments a
+        JOIN beds b ON a.bed_id = b.bed_id
+        WHERE NOT EXISTS (SELECT 1 FROM occupancy_events e WHERE e.assignment_id = a.assignment_id)
+        ''',
+        '''
+        INSERT INTO occupancy_hourly (ward, hour_start, admissions, occupied)
+        SELECT ward, hour_start, admissions,
+               SUM(admissions) OVER (PARTITION BY ward ORDER BY hour_start)
+        FROM (
+            SELECT ward, TIMESTAMP(DATE(event_time), MAKETIME(HOUR(event_time), 0, 0)) AS hour_start,
+                   COUNT(*) AS admissions
+            FROM occupancy_events
+            GROUP BY ward, hour_start
+        ) hourly
+        ON DUPLICATE KEY UPDATE admissions = VALUES(admissions), occupied = VALUES(occupied)
+        '''
+    ]),
+    (6, "Administrator accounts", [
+        if_column_missing('users', 'is_admin',
+                          'ALTER TABLE users ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT FALSE')
+    ]),
+    (7, "Discharge archival", [
+        # Set when a patient's last assignment ends, cleared on readmission
+        if_column_missing('patients', 'discharge_date',
+                          'ALTER TABLE patients ADD COLUMN discharge_date DATETIME NULL'),
+        if_index_missing('patients', 'idx_patients_discharge',
+                         'CREATE INDEX idx_patients_discharge ON patients (discharge_date)'),
+        # History tables are range-partitioned by month of discharge (see
+        # ensure_history_partitions); partitioned tables cannot have foreign
+        # keys, and the partitioning column must be part of the primary key
+        '''
+        CREATE TABLE IF NOT EXISTS assignment_history (
+            assignment_id INT NOT NULL,
+            patient_id INT NOT NULL,
+            bed_id INT,
+            ward VARCHAR(50),
+            doctor_id INT,
+            assignment_date DATETIME,
+            discharge_date DATETIME NOT NULL,
+            PRIMARY KEY (assignment_id, discharge_date),
+            INDEX idx_assignment_history_patient (patient_id),
+            INDEX idx_assignment_history_ward (ward, discharge_date)
+        )
+        PARTITION BY RANGE COLUMNS (discharge_date) (
+            PARTITION p_start VALUES LESS THAN ('2000-01-01'),
+            PARTITION p_future VALUES LESS THAN (MAXVALUE)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS patient_history (
+            patient_id INT NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            age INT NOT NULL,
+            gender ENUM('Male', 'Female', 'Other') NOT NULL,
+            contact VARCHAR(15),
+            admission_date DATETIME,
+            discharge_date DATETIME NOT NULL,
+            archived_at DATETIME NOT NULL,
+            PRIMARY KEY (patient_id, discharge_date),
+            INDEX idx_patient_history_name (name)
+        )
+        PARTITION BY RANGE COLUMNS (discharge_date) (
+            PARTITION p_start VALUES LESS THAN ('2000-01-01'),
+            PARTITION p_future VALUES LESS THAN (MAXVALUE)
+        )
+        '''
+    ]),
+    (8, "Bed turnover", [
+        "ALTER TABLE beds MODIFY status ENUM('available', 'occupied', 'maintenance', 'cleaning') NOT NULL",
+        # When the bed last became dirty; set while status is 'cleaning'
+        if_column_missing('beds', 'dirty_since',
+                          'ALTER TABLE beds ADD COLUMN dirty_since DATETIME NULL'),
+        # One row per completed clean: discharge-to-available time per bed
+        '''
+        CREATE TABLE IF NOT EXISTS bed_turnovers (
+            turnover_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            bed_id INT NOT NULL,
+            ward VARCHAR(50) NOT NULL,
+            dirty_since DATETIME NOT NULL,
+            cleaned_at DATETIME NOT NULL,
+            turnover_seconds INT NOT NULL,
+            INDEX idx_bed_turnovers_cleaned (cleaned_at),
+            INDEX idx_bed_turnovers_ward (ward, cleaned_at)
+        )
+        '''
+    ]),
+]
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+# Initialize database: apply pending migrations and record them in schema_version
+def init_db():
+    conn = get_db_connection()
+    if not conn:
+        return False
+    cursor = conn.cursor()
+
+    try:
+        # Serialise migrations across server processes sharing the database
+        cursor.execute("SELECT GET_LOCK('hospital_db_migrations', 60)")
+        if cursor.fetchone()[0] != 1:
+            st.error("Timed out waiting for another process to finish database migrations")
+            return False
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL
+            )
+        ''')
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        current_version = cursor.fetchone()[0]
+
+        for version, description, statements in MIGRATIONS:
+            if version <= current_version:
+                continue
+            # MySQL commits DDL implicitly, so every step is written to be
+            # skipped or repeated safely if an earlier attempt stopped part way
+            for statement in statements:
+                if isinstance(statement, GuardedStep):
+                    cursor.execute(statement.check, statement.params)
+                    if (cursor.fetchone()[0] > 0) != statement.run_if_found:
+                        continue
+                    statement = statement.statement
+                cursor.execute(statement)
+            cursor.execute('''
+                INSERT INTO schema_version (version, description, applied_at)
+                VALUES (%s, %s, NOW())
+            ''', (version, description))
+            conn.commit()
+        return True
+    except mysql.connector.Error as err:
+        st.error(f"Error applying database migrations: {err}")
+        return False
+    finally:
+        try:
+            cursor.execute("SELECT RELEASE_LOCK('hospital_db_migrations')")
+            cursor.fetchone()
+        except mysql.connector.Error:
+            pass
+        cursor.close()
+        conn.close()
+
+# Run migrations once per server process instead of on every rerun.
+# Failures raise so that st.cache_resource retries on the next rerun.
+@st.cache_resource
+def ensure_schema():
+    if not init_db():
+        raise RuntimeError("Database schema could not be initialised")
+    return True
 
 # Hash password using SHA-256
 def hash_password(password):
@@ -141,6 +1153,7 @@ def register(name, username, password, security_question, security_answer):
     cursor = conn.cursor()
     
     try:
+        # New accounts are never administrators; see set_admin()
         cursor.execute('''
             INSERT INTO users (name, username, password_hash, passkey, security_question, security_answer)
             VALUES (%s, %s, %s, %s, %s, %s)
@@ -153,6 +1166,41 @@ def register(name, username, password, security_question, security_answer):
         cursor.close()
         conn.close()
 
+# Grant or revoke administrator rights (the Diagnostics page and manual
+# archiving). Only reachable from manage_admins.py, never from the UI.
+def set_admin(username, is_admin):
+    conn = get_db_connection()
+    if not conn:
+        return False, "Database connection failed"
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('UPDATE users SET is_admin = %s WHERE username = %s', (is_admin, username))
+        if cursor.rowcount == 0:
+            cursor.execute('SELECT COUNT(*) FROM users WHERE username = %s', (username,))
+            if cursor.fetchone()[0] == 0:
+                return False, f"No account named {username}"
+        conn.commit()
+        return True, f"{username} is {'now' if is_admin else 'no longer'} an administrator"
+    except mysql.connector.Error as err:
+        return False, f"Error: {err}"
+    finally:
+        cursor.close()
+        conn.close()
+
+# Usernames of all administrators
+def get_admins():
+    conn = get_db_connection()
+    if not conn:
+        return []
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT username FROM users WHERE is_admin ORDER BY username')
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
 # Password reset function
 def reset_password(username, security_answer, new_password):
     if len(new_password) < 8:
@@ -203,20 +1251,28 @@ def get_security_question(username):
     
     return user['security_question'] if user else None
 
-# Add patient
-def add_patient(name, age, gender, contact):
+# Validate patient fields; returns (error message or None, values to insert)
+def validate_patient(name, age, gender, contact):
     if not name or not age or not gender:
-        return False, "Name, age, and gender are required"
+        return "Name, age, and gender are required", None
     
     try:
         age = int(age)
         if age <= 0:
             raise ValueError
-    except ValueError:
-        return False, "Age must be a positive number"
+    except (TypeError, ValueError):
+        return "Age must be a positive number", None
     
     if gender not in ['Male', 'Female', 'Other']:
-        return False, "Gender must be Male, Female, or Other"
+        return "Gender must be Male, Female, or Other", None
+    
+    return None, (name, age, gender, contact or None)
+
+# Add patient
+def add_patient(name, age, gender, contact):
+    error, values = validate_patient(name, age, gender, contact)
+    if error:
+        return False, error
     
     conn = get_db_connection()
     if not conn:
@@ -227,8 +1283,9 @@ def add_patient(name, age, gender, contact):
         cursor.execute('''
             INSERT INTO patients (name, age, gender, contact, admission_date)
             VALUES (%s, %s, %s, %s, NOW())
-        ''', (name, age, gender, contact or None))
+        ''', values)
         conn.commit()
+        invalidate_cache('patients')
         return True, "Patient added successfully"
     except mysql.connector.Error as err:
         return False, f"Error: {err}"
@@ -248,6 +1305,7 @@ def delete_patient(patient_id):
         if cursor.rowcount == 0:
             return False, "Patient not found"
         conn.commit()
+        invalidate_cache('patients')
         return True, "Patient deleted successfully"
     except mysql.connector.Error as err:
         return False, f"Error: {err}"
@@ -256,8 +1314,9 @@ def delete_patient(patient_id):
         conn.close()
 
 # Get patients
+@cached_query('patients')
 def get_patients():
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if not conn:
         return []
     cursor = conn.cursor(dictionary=True)
@@ -267,10 +1326,17 @@ def get_patients():
     conn.close()
     return patients
 
+# Validate doctor fields; returns (error message or None, values to insert)
+def validate_doctor(name, specialty, contact):
+    if not name or not specialty:
+        return "Name and specialty are required", None
+    return None, (name, specialty, contact or None)
+
 # Add doctor
 def add_doctor(name, specialty, contact):
-    if not name or not specialty:
-        return False, "Name and specialty are required"
+    error, values = validate_doctor(name, specialty, contact)
+    if error:
+        return False, error
     
     conn = get_db_connection()
     if not conn:
@@ -281,8 +1347,9 @@ def add_doctor(name, specialty, contact):
         cursor.execute('''
             INSERT INTO doctors (name, specialty, contact)
             VALUES (%s, %s, %s)
-        ''', (name, specialty, contact or None))
+        ''', values)
         conn.commit()
+        invalidate_cache('doctors')
         return True, "Doctor added successfully"
     except mysql.connector.Error as err:
         return False, f"Error: {err}"
@@ -290,212 +1357,2177 @@ def add_doctor(name, specialty, contact):
         cursor.close()
         conn.close()
 
-# Delete doctor
-def delete_doctor(doctor_id):
+# Delete doctor
+def delete_doctor(doctor_id):
+    conn = get_db_connection()
+    if not conn:
+        return False, "Database connection failed"
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('DELETE FROM doctors WHERE doctor_id = %s', (doctor_id,))
+        if cursor.rowcount == 0:
+            return False, "Doctor not found"
+        conn.commit()
+        invalidate_cache('doctors')
+        return True, "Doctor deleted successfully"
+    except mysql.connector.Error as err:
+        return False, f"Error: {err}"
+    finally:
+        cursor.close()
+        conn.close()
+
+# Get doctors
+@cached_query('doctors')
+def get_doctors():
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return []
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('SELECT * FROM doctors')
+    doctors = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return doctors
+
+# Append bed changes to the change feed inside the caller's transaction. Each
+# event carries the bed's state after the change. Versions come from
+# AUTO_INCREMENT, so concurrent writers do not queue on a shared row; the
+# row lock the caller already holds on each bed keeps one bed's events in
+# commit order.
+def record_bed_events(conn, bed_ids, event_type):
+    if not bed_ids:
+        return
+    cursor = conn.cursor()
+    try:
+        if event_type != 'deleted':
+            cursor.execute(f'''
+                INSERT INTO bed_events (bed_id, event_type, ward, status, last_cleaned, created_at)
+                SELECT bed_id, %s, ward, status, last_cleaned, NOW() FROM beds
+                WHERE bed_id IN ({', '.join(['%s'] * len(bed_ids))})
+                ORDER BY bed_id
+            ''', [event_type] + sorted(bed_ids))
+            return
+        cursor.execute(
+            'INSERT INTO bed_events (bed_id, event_type, created_at) VALUES '
+            + ', '.join(['(%s, %s, NOW())'] * len(bed_ids)),
+            [value for bed_id in sorted(bed_ids) for value in (bed_id, event_type)]
+        )
+    finally:
+        cursor.close()
+
+# One read of the change feed: the events committed after a reader's
+# watermark, oldest first; the new watermark (every version up to it is
+# either in `events` or earlier, or will never commit); and whether the
+# reader must instead reload in full because it fell behind the retained
+# events or the batch was full
+FeedBatch = namedtuple('FeedBatch', ['events', 'watermark', 'reload'])
+
+# Read the change feed after `version`; None on failure
+def read_bed_feed(version, limit=BED_FEED_BATCH_SIZE):
+    conn = get_db_connection()
+    if not conn:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute('''
+            SELECT version, bed_id, event_type, ward, status, last_cleaned,
+                   TIMESTAMPDIFF(SECOND, created_at, NOW()) AS age
+            FROM bed_events WHERE version > %s ORDER BY version LIMIT %s
+        ''', (version, limit))
+        events = cursor.fetchall()
+        cursor.execute('SELECT MIN(version) AS oldest FROM bed_events')
+        oldest = cursor.fetchone()['oldest']
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+    # Events between the watermark and the oldest retained one may have been pruned
+    pruned = oldest is not None and oldest > version + 1
+    return FeedBatch(events, feed_watermark(version, events), pruned or len(events) >= limit)
+
+# Advance a watermark over a batch of events. A missing version may belong to
+# a transaction that has not committed yet, so the watermark stops before it
+# until a later event is older than the grace period; by then the missing
+# version was rolled back.
+def feed_watermark(version, events):
+    for event in events:
+        if event['version'] != version + 1 and event['age'] < BED_FEED_CONFIG['gap_grace_seconds']:
+            break
+        version = event['version']
+    return version
+
+# Consistent snapshot of every bed plus the feed watermark it corresponds to,
+# as (version, rows); None on failure. The watermark is the newest event old
+# enough to be settled (or, if none is, just before the oldest retained
+# event); replaying later events over the snapshot is harmless because each
+# carries the bed's full state.
+def get_bed_snapshot():
+    conn = get_db_connection()
+    if not conn:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction(consistent_snapshot=True, readonly=True)
+        cursor.execute('''
+            SELECT version FROM bed_events
+            WHERE created_at < NOW() - INTERVAL %s SECOND
+            ORDER BY created_at DESC, version DESC LIMIT 1
+        ''', (BED_FEED_CONFIG['gap_grace_seconds'],))
+        row = cursor.fetchone()
+        if row:
+            version = row['version']
+        else:
+            cursor.execute('SELECT COALESCE(MIN(version) - 1, 0) AS version FROM bed_events')
+            version = cursor.fetchone()['version']
+        cursor.execute('SELECT bed_id, ward, status, last_cleaned FROM beds')
+        rows = cursor.fetchall()
+        conn.commit()
+        return version, rows
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+# Apply change-feed events to a {bed_id: bed row} mapping
+def apply_bed_events(beds, events):
+    for event in events:
+        if event['event_type'] == 'deleted':
+            beds.pop(event['bed_id'], None)
+        else:
+            beds[event['bed_id']] = {key: event[key] for key in ('bed_id', 'ward', 'status', 'last_cleaned')}
+
+# Delete all but the newest BED_FEED_CONFIG['retain_events'] change-feed
+# events, in batches. Returns the number deleted.
+def prune_bed_events():
+    conn = get_db_connection()
+    if not conn:
+        return 0
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        cursor.execute('SELECT MAX(version) FROM bed_events')
+        newest = cursor.fetchone()[0]
+        if newest is None:
+            return 0
+        cutoff = newest - BED_FEED_CONFIG['retain_events']
+        while True:
+            cursor.execute('DELETE FROM bed_events WHERE version <= %s ORDER BY version LIMIT %s',
+                           (cutoff, BED_FEED_CONFIG['prune_batch_size']))
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < BED_FEED_CONFIG['prune_batch_size']:
+                return deleted
+    except mysql.connector.Error as err:
+        logging.getLogger('hospital').warning("Could not prune bed events: %s", err)
+        return deleted
+    finally:
+        cursor.close()
+        conn.close()
+
+# In-process index of bed state: available bed ids per ward plus counts per
+# status. Loaded once, updated incrementally by the bed and assignment write
+# paths, and kept in step with other processes through the bed change feed.
+class BedIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()  # one sync/reconcile at a time
+        self._beds = {}          # bed_id -> bed row
+        self._available = {}     # ward -> set of available bed ids
+        self._counts = Counter() # status -> number of beds
+        self._writes = 0         # local updates applied, to spot ones racing a reload
+        self.version = None      # last change-feed version applied
+        self.synced_at = None
+
+    def is_stale(self, max_age):
+        if self.synced_at is None:
+            return True
+        return max_age is not None and time.monotonic() - self.synced_at > max_age
+
+    # Rebuild the index from a consistent snapshot of the beds table. The
+    # snapshot is read without holding the index lock, so lookups carry on
+    # meanwhile; local updates made during the read may predate it, so they
+    # are left for the next sync to replay from the feed.
+    def reconcile(self):
+        with self._refresh_lock:
+            return self._reconcile()
+
+    def _reconcile(self):
+        with self._lock:
+            writes = self._writes
+        snapshot = get_bed_snapshot()
+        if snapshot is None:
+            return False
+        version, rows = snapshot
+        with self._lock:
+            if self.version is not None and version < self.version:
+                return True  # older than what the index already holds
+            self.version = version
+            self._beds = {}
+            self._available = {}
+            self._counts = Counter()
+            for row in rows:
+                self._add(row)
+            self.synced_at = time.monotonic() if self._writes == writes else None
+            return True
+
+    # Replay change-feed events after the watermark, so catching up costs one
+    # small query per batch of changes; reloads in full when too far behind.
+    # Like reconcile(), the feed is read outside the index lock.
+    def sync(self):
+        with self._refresh_lock:
+            with self._lock:
+                version, writes = self.version, self._writes
+            if version is None:
+                return self._reconcile()
+            batch = read_bed_feed(version)
+            if batch is None:
+                return False
+            if batch.reload:
+                return self._reconcile()
+            with self._lock:
+                for event in batch.events:
+                    self._remove(event['bed_id'])
+                    if event['event_type'] != 'deleted':
+                        self._add({key: event[key] for key in ('bed_id', 'ward', 'status', 'last_cleaned')})
+                self.version = batch.watermark
+                self.synced_at = time.monotonic() if self._writes == writes else None
+                return True
+
+    # Catch up with the change feed on next use, e.g. after the database disagreed
+    def invalidate(self):
+        with self._lock:
+            self.synced_at = None
+
+    def upsert(self, bed):
+        with self._lock:
+            self._writes += 1
+            self._remove(bed['bed_id'])
+            self._add(dict(bed))
+
+    def remove(self, bed_id):
+        with self._lock:
+            self._writes += 1
+            self._remove(bed_id)
+
+    def set_status(self, bed_id, status):
+        with self._lock:
+            bed = self._beds.get(bed_id)
+            if bed:
+                self.upsert(dict(bed, status=status))
+
+    def get(self, bed_id):
+        with self._lock:
+            bed = self._beds.get(bed_id)
+            return dict(bed) if bed else None
+
+    def next_free_bed(self, ward):
+        with self._lock:
+            return next(iter(self._available.get(ward, ())), None)
+
+    def available_count(self, ward=None):
+        with self._lock:
+            if ward is None:
+                return self._counts['available']
+            return len(self._available.get(ward, ()))
+
+    # Lowest-numbered available beds whose ward contains `term`, or the bed
+    # with that exact ID if `term` is numeric
+    def find_available(self, term='', limit=TYPEAHEAD_LIMIT):
+        term = (term or '').strip().lower()
+        with self._lock:
+            if term.isdigit():
+                bed = self._beds.get(int(term))
+                return [dict(bed)] if bed and bed['status'] == 'available' else []
+            ids = heapq.nsmallest(limit, (
+                bed_id for ward, bed_ids in self._available.items() if term in ward.lower() for bed_id in bed_ids
+            ))
+            return [dict(self._beds[bed_id]) for bed_id in ids]
+
+    def status_counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def available_beds(self, ward=None):
+        with self._lock:
+            wards = [ward] if ward is not None else self._available.keys()
+            ids = sorted(bed_id for w in wards for bed_id in self._available.get(w, ()))
+            return [dict(self._beds[bed_id]) for bed_id in ids]
+
+    def _add(self, bed):
+        self._beds[bed['bed_id']] = bed
+        self._counts[bed['status']] += 1
+        if bed['status'] == 'available':
+            self._available.setdefault(bed['ward'], set()).add(bed['bed_id'])
+
+    def _remove(self, bed_id):
+        bed = self._beds.pop(bed_id, None)
+        if not bed:
+            return
+        self._counts[bed['status']] -= 1
+        if bed['status'] == 'available':
+            ward_beds = self._available.get(bed['ward'])
+            if ward_beds is not None:
+                ward_beds.discard(bed_id)
+                if not ward_beds:
+                    del self._available[bed['ward']]
+
+@st.cache_resource
+def _bed_index():
+    return BedIndex()
+
+# Shared bed index, loaded on first use and caught up from the change feed
+# once it goes stale
+def get_bed_index():
+    index = _bed_index()
+    if index.is_stale(BED_INDEX_SYNC_SECONDS):
+        index.sync()
+    return index
+
+# Validate bed fields; returns (error message or None, values to insert)
+def validate_bed(ward, status):
+    if not ward or not status:
+        return "Ward and status are required", None
+    
+    if status not in NEW_BED_STATUSES:
+        return f"Status must be one of: {', '.join(NEW_BED_STATUSES)}", None
+    
+    return None, (ward, status)
+
+# Add bed
+def add_bed(ward, status):
+    error, values = validate_bed(ward, status)
+    if error:
+        return False, error
+    
+    conn = get_db_connection()
+    if not conn:
+        return False, "Database connection failed"
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            INSERT INTO beds (ward, status, last_cleaned)
+            VALUES (%s, %s, NOW())
+        ''', values)
+        bed_id = cursor.lastrowid
+        record_bed_events(conn, [bed_id], 'added')
+        conn.commit()
+        invalidate_cache('beds')
+        _bed_index().upsert({'bed_id': bed_id, 'ward': ward, 'status': status, 'last_cleaned': datetime.now()})
+        return True, "Bed added successfully"
+    except mysql.connector.Error as err:
+        return False, f"Error: {err}"
+    finally:
+        cursor.close()
+        conn.close()
+
+# Delete bed
+def delete_bed(bed_id):
+    conn = get_db_connection()
+    if not conn:
+        return False, "Database connection failed"
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('DELETE FROM beds WHERE bed_id = %s', (bed_id,))
+        if cursor.rowcount == 0:
+            return False, "Bed not found"
+        record_bed_events(conn, [bed_id], 'deleted')
+        conn.commit()
+        invalidate_cache('beds')
+        _bed_index().remove(bed_id)
+        return True, "Bed deleted successfully"
+    except mysql.connector.Error as err:
+        return False, f"Error: {err}"
+    finally:
+        cursor.close()
+        conn.close()
+
+# Get beds
+@cached_query('beds')
+def get_beds():
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return []
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('SELECT * FROM beds')
+    beds = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return beds
+
+# Get available beds (served from the in-process bed index, which is kept
+# current incrementally and so needs no read cache)
+def get_available_beds(ward=None):
+    return get_bed_index().available_beds(ward)
+
+# Record admissions and discharges in the append-only occupancy history and
+# fold them into the hourly per-ward rollups, inside the caller's transaction.
+# `events` are (event_type, assignment_id, patient_id, bed_id, ward,
+# stay_seconds) tuples, with stay_seconds None for admissions.
+def record_occupancy_events(conn, events):
+    if not events:
+        return
+    event_time = datetime.now().replace(microsecond=0)
+    hour_start = event_time.replace(minute=0, second=0)
+    rollups = {}
+    for event_type, _, _, _, ward, stay_seconds in events:
+        counts = rollups.setdefault(ward, [0, 0, 0])
+        counts[0 if event_type == 'admission' else 1] += 1
+        counts[2] += stay_seconds or 0
+    cursor = conn.cursor()
+    try:
+        cursor.executemany('''
+            INSERT INTO occupancy_events (event_type, assignment_id, patient_id, bed_id, ward, stay_seconds, event_time)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', [event + (event_time,) for event in events])
+        # The first events of an hour start from the ward's latest occupancy;
+        # later ones (or a concurrent insert of the same row) adjust it in place
+        for ward in sorted(rollups):
+            admissions, discharges, stay_seconds = rollups[ward]
+            cursor.execute('''
+                INSERT INTO occupancy_hourly (ward, hour_start, admissions, discharges, stay_seconds, occupied)
+                SELECT %s, %s, %s, %s, %s, COALESCE((
+                    SELECT h.occupied FROM occupancy_hourly h
+                    WHERE h.ward = %s ORDER BY h.hour_start DESC LIMIT 1
+                ), 0) + %s
+                ON DUPLICATE KEY UPDATE
+                    admissions = admissions + VALUES(admissions),
+                    discharges = discharges + VALUES(discharges),
+                    stay_seconds = stay_seconds + VALUES(stay_seconds),
+                    occupied = occupied + VALUES(admissions) - VALUES(discharges)
+            ''', (ward, hour_start, admissions, discharges, stay_seconds, ward, admissions - discharges))
+    finally:
+        cursor.close()
+
+# Move archived patients among `patient_ids` back into patients, in the
+# caller's transaction, so they can be readmitted under the same id (the
+# archiver deletes the live row, and assignments reference patients). Their
+# archived stays stay in assignment_history. Returns the ids restored.
+def restore_archived_patients(conn, patient_ids):
+    if not patient_ids:
+        return set()
+    cursor = conn.cursor()
+    try:
+        # Locking reads: a patient the archiver is moving right now is waited
+        # for, then found in patient_history
+        placeholders = ', '.join(['%s'] * len(patient_ids))
+        cursor.execute(f'SELECT patient_id FROM patients WHERE patient_id IN ({placeholders}) LOCK IN SHARE MODE',
+                       list(patient_ids))
+        archived = sorted(set(patient_ids) - {row[0] for row in cursor.fetchall()})
+        if not archived:
+            return set()
+        cursor.execute(f'''
+            SELECT patient_id FROM patient_history WHERE patient_id IN ({", ".join(["%s"] * len(archived))})
+            FOR UPDATE
+        ''', archived)
+        restored = sorted({row[0] for row in cursor.fetchall()})
+        if not restored:
+            return set()
+        placeholders = ', '.join(['%s'] * len(restored))
+        cursor.execute(f'''
+            INSERT INTO patients (patient_id, name, age, gender, contact, admission_date, discharge_date)
+            SELECT h.patient_id, h.name, h.age, h.gender, h.contact, h.admission_date, h.discharge_date
+            FROM patient_history h
+            WHERE h.patient_id IN ({placeholders})
+              AND h.discharge_date = (SELECT MAX(l.discharge_date) FROM patient_history l
+                                      WHERE l.patient_id = h.patient_id)
+        ''', restored)
+        cursor.execute(f'DELETE FROM patient_history WHERE patient_id IN ({placeholders})', restored)
+        return set(restored)
+    finally:
+        cursor.close()
+
+# Kinds of failure the data-access functions report next to their messages,
+# so callers such as the JSON API can react without parsing text:
+# 'invalid' (bad input), 'not_found', 'conflict' (e.g. the bed was taken),
+# 'unavailable' (no database connection) and 'database' (any other error)
+ER_NO_REFERENCED_ROW = 1452  # MySQL: foreign key target does not exist
+
+# Admit a patient to a bed. Returns {'assignment_id', 'error', 'error_kind'},
+# with assignment_id None on failure.
+def admit_patient(patient_id, bed_id, doctor_id):
+    result = {'assignment_id': None, 'error': None, 'error_kind': None}
+    if not patient_id or not bed_id or not doctor_id:
+        return dict(result, error="Please select a patient, bed, and doctor", error_kind='invalid')
+    
+    conn = get_db_connection()
+    if not conn:
+        return dict(result, error="Database connection failed", error_kind='unavailable')
+    cursor = conn.cursor(dictionary=True)
+    
+    try:
+        # Claim the bed with a conditional update: InnoDB locks only this row
+        # and exactly one concurrent admission can see it as available
+        cursor.execute('UPDATE beds SET status = "occupied" WHERE bed_id = %s AND status = "available"', (bed_id,))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            _bed_index().invalidate()
+            invalidate_cache('beds')
+            return dict(result, error="Selected bed is not available", error_kind='conflict')
+        
+        restored = restore_archived_patients(conn, [patient_id])
+        cursor.execute('''
+            INSERT INTO assignments (patient_id, bed_id, doctor_id, assignment_date)
+            VALUES (%s, %s, %s, NOW())
+        ''', (patient_id, bed_id, doctor_id))
+        assignment_id = cursor.lastrowid
+        cursor.execute('UPDATE patients SET discharge_date = NULL WHERE patient_id = %s', (patient_id,))
+        record_bed_events(conn, [bed_id], 'updated')
+        cursor.execute('SELECT ward FROM beds WHERE bed_id = %s', (bed_id,))
+        ward = cursor.fetchone()['ward']
+        record_occupancy_events(conn, [('admission', assignment_id, patient_id, bed_id, ward, None)])
+        
+        conn.commit()
+        invalidate_cache('assignments', 'beds', 'occupancy_hourly')
+        if restored:
+            invalidate_cache('patients', 'patient_history')
+        _bed_index().set_status(bed_id, 'occupied')
+        return dict(result, assignment_id=assignment_id)
+    except mysql.connector.Error as err:
+        if err.errno == ER_NO_REFERENCED_ROW:
+            return dict(result, error="Patient or doctor not found", error_kind='not_found')
+        return dict(result, error=f"Error: {err}", error_kind='database')
+    finally:
+        cursor.close()
+        conn.close()
+
+# Create assignment
+def create_assignment(patient_id, bed_id, doctor_id):
+    result = admit_patient(patient_id, bed_id, doctor_id)
+    if result['error']:
+        return False, result['error']
+    return True, "Assignment created successfully"
+
+# Delete assignment
+def delete_assignment(assignment_id):
+    report = discharge_assignments([assignment_id])
+    if report['error']:
+        return False, report['error']
+    if report['skipped']:
+        return False, report['skipped'][0]['reason']
+    return True, "Assignment deleted successfully"
+
+# Batch mutations take lists of ids (or a filter), lock the matching rows,
+# apply set-based statements in one transaction and return a report listing
+# the ids changed ('succeeded'), the ids left alone with a reason ('skipped')
+# and any error with its kind, in which case nothing was changed
+def new_batch_report():
+    return {'succeeded': [], 'skipped': [], 'error': None, 'error_kind': None}
+
+# Normalise requested ids: ints, without duplicates, in lock order
+def batch_ids(ids):
+    return sorted({int(i) for i in ids or ()})
+
+# Discharge the listed assignments, every assignment of the listed patients,
+# or every assignment in `ward` (e.g. when a ward is evacuated): each stay
+# moves to history, its bed goes to housekeeping and its patient is marked
+# discharged once no stay remains
+def discharge_assignments(assignment_ids=None, patient_ids=None, ward=None):
+    report = new_batch_report()
+    ids = batch_ids(assignment_ids)
+    patients = batch_ids(patient_ids)
+    if not ids and not patients and not ward:
+        return report
+    conn = get_db_connection()
+    if not conn:
+        return dict(report, error="Database connection failed", error_kind='unavailable')
+    cursor = conn.cursor()
+    
+    try:
+        if ids:
+            condition, params = f'a.assignment_id IN ({", ".join(["%s"] * len(ids))})', ids
+        elif patients:
+            condition, params = f'a.patient_id IN ({", ".join(["%s"] * len(patients))})', patients
+        else:
+            condition, params = 'b.ward = %s', [ward]
+        # Lock the assignments so a concurrent discharge cannot free a bed twice
+        cursor.execute(f'''
+            SELECT a.assignment_id, a.bed_id, a.patient_id, a.assignment_date, b.ward
+            FROM assignments a
+            JOIN beds b ON a.bed_id = b.bed_id
+            WHERE {condition}
+            ORDER BY a.assignment_id
+            FOR UPDATE
+        ''', params)
+        stays = cursor.fetchall()
+        found = [row[0] for row in stays]
+        if ids:
+            missing = set(ids) - set(found)
+            report['skipped'] = [{'id': i, 'reason': "Assignment not found"} for i in ids if i in missing]
+        elif patients:
+            admitted = {row[2] for row in stays}
+            report['skipped'] = [{'id': i, 'reason': "Patient has no current assignment"}
+                                 for i in patients if i not in admitted]
+        if not stays:
+            return report
+        
+        discharged_at = datetime.now().replace(microsecond=0)
+        stay_ids = ', '.join(['%s'] * len(found))
+        bed_ids = sorted({row[1] for row in stays})
+        patient_ids = sorted({row[2] for row in stays})
+        # The finished stays move to history so assignments holds only the
+        # current census
+        cursor.execute(f'''
+            INSERT INTO assignment_history (assignment_id, patient_id, bed_id, ward, doctor_id, assignment_date,
+                                            discharge_date)
+            SELECT a.assignment_id, a.patient_id, a.bed_id, b.ward, a.doctor_id, a.assignment_date, %s
+            FROM assignments a
+            JOIN beds b ON a.bed_id = b.bed_id
+            WHERE a.assignment_id IN ({stay_ids})
+        ''', [discharged_at] + found)
+        cursor.execute(f'DELETE FROM assignments WHERE assignment_id IN ({stay_ids})', found)
+        cursor.execute(f'''
+            UPDATE patients p SET discharge_date = %s
+            WHERE p.patient_id IN ({", ".join(["%s"] * len(patient_ids))})
+              AND NOT EXISTS (SELECT 1 FROM assignments a WHERE a.patient_id = p.patient_id)
+        ''', [discharged_at] + patient_ids)
+        # The beds go to housekeeping rather than straight back into use
+        cursor.execute(f'''
+            UPDATE beds SET status = "cleaning", dirty_since = %s
+            WHERE bed_id IN ({", ".join(["%s"] * len(bed_ids))})
+        ''', [discharged_at] + bed_ids)
+        record_bed_events(conn, bed_ids, 'updated')
+        record_occupancy_events(conn, [
+            ('discharge', assignment_id, patient_id, bed_id, ward,
+             int((discharged_at - assignment_date).total_seconds()) if assignment_date else None)
+            for assignment_id, bed_id, patient_id, assignment_date, ward in stays
+        ])
+        
+        conn.commit()
+    except mysql.connector.Error as err:
+        return dict(new_batch_report(), error=f"Error: {err}", error_kind='database')
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_cache('assignments', 'beds', 'occupancy_hourly', 'assignment_history')
+    index = _bed_index()
+    for bed_id in bed_ids:
+        index.set_status(bed_id, 'cleaning')
+    report['succeeded'] = found
+    return report
+
+# Statuses a batch may set by hand; occupancy and cleaning follow admissions
+# and discharges
+BATCH_BED_STATUSES = ['available', 'maintenance']
+
+# Set the status of the listed beds, or of every bed in `ward` (e.g. to close
+# a ward for maintenance). Occupied beds are never changed, and beds waiting
+# for cleaning are only released through complete_cleaning(). A dirty bed put
+# into maintenance keeps its dirty_since, and goes back to the cleaning queue
+# rather than to available when the maintenance ends.
+def set_beds_status(status, bed_ids=None, ward=None):
+    report = new_batch_report()
+    if status not in BATCH_BED_STATUSES:
+        return dict(report, error=f"Status must be one of: {', '.join(BATCH_BED_STATUSES)}", error_kind='invalid')
+    ids = batch_ids(bed_ids)
+    if not ids and not ward:
+        return dict(report, error="Choose beds or a ward", error_kind='invalid')
+    conn = get_db_connection()
+    if not conn:
+        return dict(report, error="Database connection failed", error_kind='unavailable')
+    cursor = conn.cursor()
+    
+    try:
+        if ids:
+            cursor.execute(f'''
+                SELECT bed_id, status, dirty_since FROM beds WHERE bed_id IN ({", ".join(["%s"] * len(ids))})
+                ORDER BY bed_id FOR UPDATE
+            ''', ids)
+        else:
+            cursor.execute('SELECT bed_id, status, dirty_since FROM beds WHERE ward = %s ORDER BY bed_id FOR UPDATE',
+                           (ward,))
+        rows = cursor.fetchall()
+        current = {bed_id: bed_status for bed_id, bed_status, _ in rows}
+        dirty = {bed_id for bed_id, _, dirty_since in rows if dirty_since}
+        changed = []
+        for bed_id in ids or sorted(current):
+            if bed_id not in current:
+                report['skipped'].append({'id': bed_id, 'reason': "Bed not found"})
+            elif current[bed_id] == 'occupied':
+                report['skipped'].append({'id': bed_id, 'reason': "Bed is occupied"})
+            elif current[bed_id] == 'cleaning' and status == 'available':
+                report['skipped'].append({'id': bed_id, 'reason': "Bed is waiting for cleaning"})
+            elif current[bed_id] == status:
+                report['skipped'].append({'id': bed_id, 'reason': f"Bed is already {status}"})
+            else:
+                changed.append(bed_id)
+        if not changed:
+            return report
+        
+        new_status = {bed_id: 'cleaning' if status == 'available' and bed_id in dirty else status
+                      for bed_id in changed}
+        for target in sorted(set(new_status.values())):
+            targets = [bed_id for bed_id in changed if new_status[bed_id] == target]
+            cursor.execute(f'''
+                UPDATE beds SET status = %s
+                WHERE bed_id IN ({", ".join(["%s"] * len(targets))})
+            ''', [target] + targets)
+        record_bed_events(conn, changed, 'updated')
+        conn.commit()
+    except mysql.connector.Error as err:
+        return dict(new_batch_report(), error=f"Error: {err}", error_kind='database')
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_cache('beds')
+    index = _bed_index()
+    for bed_id in changed:
+        index.set_status(bed_id, new_status[bed_id])
+    report['succeeded'] = changed
+    return report
+
+# Delete the listed beds; beds holding an assignment are kept
+def delete_beds(bed_ids):
+    report = new_batch_report()
+    ids = batch_ids(bed_ids)
+    if not ids:
+        return report
+    conn = get_db_connection()
+    if not conn:
+        return dict(report, error="Database connection failed", error_kind='unavailable')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f'''
+            SELECT b.bed_id, EXISTS (SELECT 1 FROM assignments a WHERE a.bed_id = b.bed_id)
+            FROM beds b WHERE b.bed_id IN ({", ".join(["%s"] * len(ids))})
+            ORDER BY b.bed_id FOR UPDATE
+        ''', ids)
+        assigned = dict(cursor.fetchall())
+        deleted = []
+        for bed_id in ids:
+            if bed_id not in assigned:
+                report['skipped'].append({'id': bed_id, 'reason': "Bed not found"})
+            elif assigned[bed_id]:
+                report['skipped'].append({'id': bed_id, 'reason': "Bed has an active assignment"})
+            else:
+                deleted.append(bed_id)
+        if not deleted:
+            return report
+        
+        cursor.execute(f'DELETE FROM beds WHERE bed_id IN ({", ".join(["%s"] * len(deleted))})', deleted)
+        record_bed_events(conn, deleted, 'deleted')
+        conn.commit()
+    except mysql.connector.Error as err:
+        return dict(new_batch_report(), error=f"Error: {err}", error_kind='database')
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_cache('beds')
+    index = _bed_index()
+    for bed_id in deleted:
+        index.remove(bed_id)
+    report['succeeded'] = deleted
+    return report
+
+# Delete the listed patients; patients with an active assignment are kept
+def delete_patients(patient_ids):
+    report = new_batch_report()
+    ids = batch_ids(patient_ids)
+    if not ids:
+        return report
+    conn = get_db_connection()
+    if not conn:
+        return dict(report, error="Database connection failed", error_kind='unavailable')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f'''
+            SELECT p.patient_id, EXISTS (SELECT 1 FROM assignments a WHERE a.patient_id = p.patient_id)
+            FROM patients p WHERE p.patient_id IN ({", ".join(["%s"] * len(ids))})
+            ORDER BY p.patient_id FOR UPDATE
+        ''', ids)
+        assigned = dict(cursor.fetchall())
+        deleted = []
+        for patient_id in ids:
+            if patient_id not in assigned:
+                report['skipped'].append({'id': patient_id, 'reason': "Patient not found"})
+            elif assigned[patient_id]:
+                report['skipped'].append({'id': patient_id, 'reason': "Patient has an active assignment"})
+            else:
+                deleted.append(patient_id)
+        if not deleted:
+            return report
+        
+        cursor.execute(f'DELETE FROM patients WHERE patient_id IN ({", ".join(["%s"] * len(deleted))})', deleted)
+        conn.commit()
+    except mysql.connector.Error as err:
+        return dict(new_batch_report(), error=f"Error: {err}", error_kind='database')
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_cache('patients')
+    report['succeeded'] = deleted
+    return report
+
+# Beds waiting for housekeeping, most urgent first: each is scored by hours
+# since it became dirty plus a bonus that grows as its ward runs out of free
+# beds. Free-bed counts come from the bed index; a heap picks the top `limit`.
+def get_housekeeping_queue(limit=None):
+    conn = get_db_connection()
+    if not conn:
+        return []
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute('SELECT bed_id, ward, dirty_since FROM beds WHERE status = "cleaning"')
+        dirty = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    index = get_bed_index()
+    now = datetime.now()
+    free = {}
+    for bed in dirty:
+        if bed['ward'] not in free:
+            free[bed['ward']] = index.available_count(bed['ward'])
+        waited_hours = (now - (bed['dirty_since'] or now)).total_seconds() / 3600
+        bed['free_in_ward'] = free[bed['ward']]
+        bed['waited_hours'] = round(waited_hours, 2)
+        bed['priority'] = round(waited_hours + HOUSEKEEPING_CONFIG['full_ward_bonus_hours'] / (1 + free[bed['ward']]), 2)
+    key = lambda bed: (bed['priority'], -bed['bed_id'])
+    if limit is None:
+        return sorted(dirty, key=key, reverse=True)
+    return heapq.nlargest(limit, dirty, key=key)
+
+# Mark a bed clean: release it for admissions, stamp last_cleaned and record
+# how long the turnover took
+def complete_cleaning(bed_id):
+    conn = get_db_connection()
+    if not conn:
+        return False, "Database connection failed"
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT ward, dirty_since FROM beds WHERE bed_id = %s AND status = "cleaning" FOR UPDATE',
+                       (bed_id,))
+        result = cursor.fetchone()
+        if not result:
+            return False, "Bed is not waiting for cleaning"
+        
+        ward, dirty_since = result
+        cleaned_at = datetime.now().replace(microsecond=0)
+        cursor.execute('''
+            UPDATE beds SET status = "available", last_cleaned = %s, dirty_since = NULL WHERE bed_id = %s
+        ''', (cleaned_at, bed_id))
+        if dirty_since:
+            cursor.execute('''
+                INSERT INTO bed_turnovers (bed_id, ward, dirty_since, cleaned_at, turnover_seconds)
+                VALUES (%s, %s, %s, %s, %s)
+            ''', (bed_id, ward, dirty_since, cleaned_at, int((cleaned_at - dirty_since).total_seconds())))
+        record_bed_events(conn, [bed_id], 'updated')
+        
+        conn.commit()
+        invalidate_cache('beds', 'bed_turnovers')
+        _bed_index().upsert({'bed_id': bed_id, 'ward': ward, 'status': 'available', 'last_cleaned': cleaned_at})
+        return True, f"Bed {bed_id} is clean and available"
+    except mysql.connector.Error as err:
+        return False, f"Error: {err}"
+    finally:
+        cursor.close()
+        conn.close()
+
+# Turnover per ward over the last `days` days: completed cleans with mean,
+# median and 90th percentile discharge-to-available hours, plus the beds
+# still waiting and the longest current wait
+@cached_query('bed_turnovers', 'beds', ttl=60)
+def get_turnover_metrics(days=HOUSEKEEPING_CONFIG['metrics_days']):
+    dtypes = {'turnover_seconds': 'float64', 'waiting': 'int64', 'longest_wait_seconds': 'float64'}
+    done = read_frame('SELECT ward, turnover_seconds FROM bed_turnovers WHERE cleaned_at >= %s',
+                      (datetime.now() - timedelta(days=days),), dtypes)
+    waiting = read_frame('''
+        SELECT ward, COUNT(*) AS waiting, TIMESTAMPDIFF(SECOND, MIN(dirty_since), NOW()) AS longest_wait_seconds
+        FROM beds WHERE status = 'cleaning'
+        GROUP BY ward
+    ''', dtypes=dtypes)
+    if done.empty and waiting.empty:
+        return pd.DataFrame()
+    hours = (done['turnover_seconds'] / 3600).groupby(done['ward'])
+    metrics = pd.DataFrame({
+        'turnovers': hours.size(),
+        'mean_hours': hours.mean().round(2),
+        'median_hours': hours.median().round(2),
+        'p90_hours': hours.quantile(0.9).round(2)
+    })
+    if not waiting.empty:
+        waiting = waiting.set_index('ward')
+        metrics = metrics.join(pd.DataFrame({
+            'waiting': waiting['waiting'],
+            'longest_wait_hours': (waiting['longest_wait_seconds'] / 3600).round(2)
+        }), how='outer')
+    metrics.index.name = 'ward'
+    return metrics.fillna({'turnovers': 0, 'waiting': 0}).sort_values('mean_hours', ascending=False)
+
+# Pending admission for the batch allocator: wards in order of preference
+# (empty for any ward), the doctor specialty needed (None for any) and a
+# priority; higher priorities are placed first
+Admission = namedtuple('Admission', ['patient_id', 'wards', 'specialty', 'priority'], defaults=((), None, 0))
+
+# Parse admission records (dicts with patient_id, wards separated by ';',
+# specialty and priority); returns (admissions, errors)
+def parse_admissions(records):
+    admissions, errors = [], []
+    for row_number, record in enumerate(records, start=1):
+        patient_id = clean_import_value(record.get('patient_id'))
+        priority = clean_import_value(record.get('priority')) or 0
+        try:
+            patient_id, priority = int(patient_id), int(priority)
+        except (TypeError, ValueError):
+            errors.append({'row': row_number, 'error': "Patient ID and priority must be whole numbers"})
+            continue
+        wards = tuple(w.strip() for w in (clean_import_value(record.get('wards')) or '').split(';') if w.strip())
+        admissions.append(Admission(patient_id, wards, clean_import_value(record.get('specialty')), priority))
+    return admissions, errors
+
+# Match admissions to beds and doctors without touching the database.
+# `beds` are (bed_id, ward) pairs of available beds, `doctors` are
+# (doctor_id, specialty, current caseload) tuples. Admissions are placed
+# greedily by priority, most constrained first: each takes the lowest free
+# bed in its first preferred ward with room (or in the ward with most free
+# beds when it has no preference or `fallback_to_any_ward` is set) and the
+# least-loaded doctor of the needed specialty. Heaps keep every step
+# O(log n). Returns (placements, unplaced) where placements are
+# (admission, bed_id, ward, doctor_id) and unplaced are (admission, reason).
+def plan_allocation(admissions, beds, doctors, fallback_to_any_ward=False):
+    free = {}
+    for bed_id, ward in beds:
+        free.setdefault(ward, []).append(bed_id)
+    for bed_ids in free.values():
+        heapq.heapify(bed_ids)
+    # Max-heap of wards by free beds; entries go stale as beds are taken and
+    # are refreshed lazily when popped
+    roomiest = [(-len(bed_ids), ward) for ward, bed_ids in free.items()]
+    heapq.heapify(roomiest)
+
+    loads = {}
+    by_specialty = {None: []}
+    for doctor_id, specialty, caseload in doctors:
+        loads[doctor_id] = caseload
+        by_specialty[None].append((caseload, doctor_id))
+        if specialty:
+            by_specialty.setdefault(specialty.strip().lower(), []).append((caseload, doctor_id))
+    for heap in by_specialty.values():
+        heapq.heapify(heap)
+
+    def least_loaded_doctor(specialty):
+        heap = by_specialty.get(specialty.strip().lower() if specialty else None)
+        while heap:
+            caseload, doctor_id = heap[0]
+            if caseload == loads[doctor_id]:
+                return doctor_id
+            heapq.heapreplace(heap, (loads[doctor_id], doctor_id))
+        return None
+
+    def roomiest_ward():
+        while roomiest:
+            count, ward = roomiest[0]
+            if -count == len(free[ward]):
+                return ward if count else None
+            heapq.heapreplace(roomiest, (-len(free[ward]), ward))
+        return None
+
+    def take_bed(admission):
+        for ward in admission.wards:
+            if free.get(ward):
+                return ward
+        if not admission.wards or fallback_to_any_ward:
+            return roomiest_ward()
+        return None
+
+    placements, unplaced, seen = [], [], set()
+    order = sorted(range(len(admissions)), key=lambda i: (
+        -admissions[i].priority, len(admissions[i].wards) or len(free) + 1, i))
+    for i in order:
+        admission = admissions[i]
+        if admission.patient_id in seen:
+            unplaced.append((admission, "Patient appears more than once in the batch"))
+            continue
+        seen.add(admission.patient_id)
+        doctor_id = least_loaded_doctor(admission.specialty)
+        if doctor_id is None:
+            unplaced.append((admission, f"No doctor with specialty {admission.specialty}"))
+            continue
+        ward = take_bed(admission)
+        if ward is None:
+            unplaced.append((admission, "No available bed in the preferred wards"))
+            continue
+        loads[doctor_id] += 1
+        placements.append((admission, heapq.heappop(free[ward]), ward, doctor_id))
+    return placements, unplaced
+
+# Place a batch of admissions and commit every assignment in one transaction.
+# The plan is made from an unlocked read of the free beds and only the beds it
+# picks are locked (skipping any a concurrent admission holds), so single
+# admissions elsewhere carry on; admissions whose bed was lost are re-planned.
+# Returns a report with the assignments made, the admissions that could not
+# be placed and any error.
+def allocate_beds(admissions, fallback_to_any_ward=False):
+    report = {'assigned': [], 'unplaced': [], 'error': None, 'error_kind': None}
+    if not admissions:
+        return report
+    if len(admissions) > ALLOCATION_MAX_BATCH:
+        return dict(report, error=f"At most {ALLOCATION_MAX_BATCH} admissions can be allocated at once",
+                    error_kind='invalid')
+
+    conn = get_db_connection()
+    if not conn:
+        return dict(report, error="Database connection failed", error_kind='unavailable')
+    cursor = conn.cursor()
+
+    try:
+        # Each round must see beds taken since the previous one
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL READ COMMITTED')
+        patient_ids = sorted({admission.patient_id for admission in admissions})
+        # Archived patients count as known; only those placed are restored
+        placeholders = ', '.join(['%s'] * len(patient_ids))
+        cursor.execute(f'''
+            SELECT patient_id FROM patients WHERE patient_id IN ({placeholders})
+            UNION
+            SELECT patient_id FROM patient_history WHERE patient_id IN ({placeholders})
+        ''', patient_ids + patient_ids)
+        known = {row[0] for row in cursor.fetchall()}
+        report['unplaced'] = [{'patient_id': a.patient_id, 'reason': "Patient not found"}
+                              for a in admissions if a.patient_id not in known]
+        admissions = [a for a in admissions if a.patient_id in known]
+
+        cursor.execute('''
+            SELECT d.doctor_id, d.specialty, COUNT(a.assignment_id)
+            FROM doctors d
+            LEFT JOIN assignments a ON a.doctor_id = d.doctor_id
+            GROUP BY d.doctor_id, d.specialty
+        ''')
+        doctors = cursor.fetchall()
+
+        placements, pending = [], admissions
+        for _ in range(ALLOCATION_CLAIM_ROUNDS):
+            cursor.execute('SELECT bed_id, ward FROM beds WHERE status = "available" ORDER BY bed_id')
+            held = {bed_id for _, bed_id, _, _ in placements}
+            beds = [row for row in cursor.fetchall() if row[0] not in held]
+            booked = Counter(doctor_id for _, _, _, doctor_id in placements)
+            planned, unplaced = plan_allocation(
+                pending, beds, [(d, specialty, load + booked[d]) for d, specialty, load in doctors],
+                fallback_to_any_ward)
+            report['unplaced'] += [{'patient_id': a.patient_id, 'reason': reason} for a, reason in unplaced]
+            if not planned:
+                pending = []
+                break
+            # Lock only the planned beds; any taken or held elsewhere meanwhile
+            # are skipped and their admissions planned again
+            planned_beds = sorted(bed_id for _, bed_id, _, _ in planned)
+            cursor.execute(f'''
+                SELECT bed_id FROM beds
+                WHERE bed_id IN ({", ".join(["%s"] * len(planned_beds))}) AND status = "available"
+                FOR UPDATE SKIP LOCKED
+            ''', planned_beds)
+            claimed = {row[0] for row in cursor.fetchall()}
+            placements += [p for p in planned if p[1] in claimed]
+            pending = [p[0] for p in planned if p[1] not in claimed]
+            if not pending:
+                break
+        report['unplaced'] += [{'patient_id': a.patient_id, 'reason': "Beds were taken by concurrent admissions"}
+                               for a in pending]
+        if not placements:
+            conn.rollback()
+            return report
+
+        bed_ids = sorted(bed_id for _, bed_id, _, _ in placements)
+        cursor.execute(f'UPDATE beds SET status = "occupied" WHERE bed_id IN ({", ".join(["%s"] * len(bed_ids))})',
+                       bed_ids)
+        restored = restore_archived_patients(conn, sorted({a.patient_id for a, _, _, _ in placements}))
+        cursor.execute(
+            'INSERT INTO assignments (patient_id, bed_id, doctor_id, assignment_date) VALUES '
+            + ', '.join(['(%s, %s, %s, NOW())'] * len(placements)),
+            [value for a, bed_id, _, doctor_id in placements for value in (a.patient_id, bed_id, doctor_id)]
+        )
+        # Read the ids back rather than assume they are consecutive (they are
+        # not with auto_increment_increment > 1); each locked bed holds only
+        # the assignment just made
+        cursor.execute(f'SELECT bed_id, assignment_id FROM assignments WHERE bed_id IN ({", ".join(["%s"] * len(bed_ids))})',
+                       bed_ids)
+        assignment_ids = dict(cursor.fetchall())
+        placed_ids = [a.patient_id for a, _, _, _ in placements]
+        cursor.execute(f'UPDATE patients SET discharge_date = NULL WHERE patient_id IN ({", ".join(["%s"] * len(placed_ids))})',
+                       placed_ids)
+        record_bed_events(conn, bed_ids, 'updated')
+        record_occupancy_events(conn, [
+            ('admission', assignment_ids[bed_id], a.patient_id, bed_id, ward, None)
+            for a, bed_id, ward, _ in placements
+        ])
+        conn.commit()
+    except mysql.connector.Error as err:
+        return dict(report, error=f"Error: {err}", error_kind='database', unplaced=[])
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_cache('assignments', 'beds', 'occupancy_hourly')
+    if restored:
+        invalidate_cache('patients', 'patient_history')
+    index = _bed_index()
+    for bed_id in bed_ids:
+        index.set_status(bed_id, 'occupied')
+    report['assigned'] = [
+        {'assignment_id': assignment_ids[bed_id], 'patient_id': a.patient_id, 'bed_id': bed_id, 'ward': ward,
+         'doctor_id': doctor_id}
+        for a, bed_id, ward, doctor_id in placements
+    ]
+    return report
+
+# Tables holding archived stays, partitioned by month of discharge
+HISTORY_TABLES = ['assignment_history', 'patient_history']
+
+# First day of the month `months` after the month of `day`
+def add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+# Split the catch-all partition of each history table so that every month from
+# the current one to `months_ahead` ahead has its own partition
+def ensure_history_partitions(conn, months_ahead=ARCHIVE_CONFIG['partition_months_ahead']):
+    cursor = conn.cursor()
+    try:
+        this_month = datetime.now().date().replace(day=1)
+        for table in HISTORY_TABLES:
+            cursor.execute('''
+                SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ''', (table,))
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [add_months(this_month, i) for i in range(months_ahead + 1)
+                       if f"p{add_months(this_month, i):%Y%m}" not in existing]
+            # Months must be added in order, so skip any older than the newest partition
+            newest = max((name for name in existing if name[1:].isdigit()), default=None)
+            missing = [month for month in missing if newest is None or f"p{month:%Y%m}" > newest]
+            if not missing:
+                continue
+            partitions = ', '.join(
+                f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')" for month in missing)
+            cursor.execute(f'''
+                ALTER TABLE {table} REORGANIZE PARTITION p_future INTO (
+                    {partitions}, PARTITION p_future VALUES LESS THAN (MAXVALUE)
+                )
+            ''')
+    finally:
+        cursor.close()
+
+# Move patients discharged before the retention cutoff, and not readmitted,
+# into patient_history, one batch per transaction. Returns the number moved.
+# Only patient records are moved here: their stays already went to
+# assignment_history when they were discharged (see discharge_assignments),
+# and an archived patient who is admitted again is restored by
+# restore_archived_patients(). Serialised across processes with an advisory
+# lock.
+def archive_discharged(retention_days=ARCHIVE_CONFIG['retention_days'], batch_size=ARCHIVE_CONFIG['batch_size']):
+    conn = get_db_connection()
+    if not conn:
+        return 0
+    cursor = conn.cursor()
+    archived = 0
+    try:
+        cursor.execute("SELECT GET_LOCK('hospital_archiver', 0)")
+        if cursor.fetchone()[0] != 1:
+            return 0  # another process is archiving
+        try:
+            ensure_history_partitions(conn)
+            cutoff = datetime.now() - timedelta(days=retention_days)
+            while True:
+                # Locking the rows makes a concurrent readmission wait for the
+                # batch, then restore the patient it moved
+                cursor.execute('''
+                    SELECT patient_id FROM patients p
+                    WHERE discharge_date < %s
+                      AND NOT EXISTS (SELECT 1 FROM assignments a WHERE a.patient_id = p.patient_id)
+                    ORDER BY discharge_date
+                    LIMIT %s
+                    FOR UPDATE
+                ''', (cutoff, batch_size))
+                patient_ids = [row[0] for row in cursor.fetchall()]
+                if not patient_ids:
+                    conn.rollback()
+                    break
+                placeholders = ', '.join(['%s'] * len(patient_ids))
+                cursor.execute(f'''
+                    INSERT INTO patient_history (patient_id, name, age, gender, contact, admission_date,
+                                                 discharge_date, archived_at)
+                    SELECT patient_id, name, age, gender, contact, admission_date, discharge_date, NOW()
+                    FROM patients WHERE patient_id IN ({placeholders})
+                ''', patient_ids)
+                cursor.execute(f'DELETE FROM patients WHERE patient_id IN ({placeholders})', patient_ids)
+                conn.commit()
+                archived += len(patient_ids)
+                if len(patient_ids) < batch_size:
+                    break
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('hospital_archiver')")
+            cursor.fetchone()
+    except mysql.connector.Error as err:
+        logging.getLogger('hospital').warning("Archival stopped: %s", err)
+    finally:
+        cursor.close()
+        conn.close()
+        if archived:
+            invalidate_cache('patients', 'patient_history')
+    return archived
+
+# Background archiver, one per server process
+@st.cache_resource
+def start_archiver():
+    def run():
+        while True:
+            archive_discharged()
+            prune_bed_events()
+            time.sleep(ARCHIVE_CONFIG['interval'])
+    thread = threading.Thread(target=run, name='discharge-archiver', daemon=True)
+    thread.start()
+    return thread
+
+# Archived stays discharged between `start` and `end` (datetimes), newest
+# first, optionally for one ward or patients whose name contains `name`.
+# The discharge-date range lets MySQL prune to the matching partitions.
+@cached_query('assignment_history', 'patient_history', 'patients')
+def search_history(start, end, ward=None, name=None, limit=SEARCH_RESULT_LIMIT):
+    query = '''
+        SELECT h.assignment_id, h.patient_id, COALESCE(p.name, ph.name) AS patient_name, h.bed_id, h.ward,
+               h.doctor_id, h.assignment_date, h.discharge_date
+        FROM assignment_history h
+        LEFT JOIN patients p ON p.patient_id = h.patient_id
+        LEFT JOIN patient_history ph ON ph.patient_id = h.patient_id
+        WHERE h.discharge_date >= %s AND h.discharge_date < %s
+    '''
+    params = [start, end]
+    if ward:
+        query += ' AND h.ward = %s'
+        params.append(ward)
+    if name:
+        query += " AND COALESCE(p.name, ph.name) LIKE %s"
+        params.append(f"%{escape_like(name)}%")
+    query += ' ORDER BY h.discharge_date DESC LIMIT %s'
+    params.append(limit)
+    return read_frame(query, params)
+
+# Everything known about one patient: the live or archived record, and every
+# archived stay, oldest first
+def get_patient_history(patient_id):
+    record = read_frame('''
+        SELECT patient_id, name, age, gender, contact, admission_date, discharge_date, NULL AS archived_at
+        FROM patients WHERE patient_id = %s
+        UNION ALL
+        SELECT patient_id, name, age, gender, contact, admission_date, discharge_date, archived_at
+        FROM patient_history WHERE patient_id = %s
+    ''', (patient_id, patient_id))
+    stays = read_frame('''
+        SELECT assignment_id, bed_id, ward, doctor_id, assignment_date, discharge_date
+        FROM assignment_history WHERE patient_id = %s
+        ORDER BY assignment_date
+    ''', (patient_id,))
+    return {'patient': record, 'stays': stays}
+
+# Row counts of the live and history tables (estimates for the large ones)
+def get_archive_stats():
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ('patients', 'assignments', %s, %s)
+        ''', HISTORY_TABLES)
+        return {table: int(rows or 0) for table, rows in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+# Get assignments
+@cached_query('assignments', 'patients', 'beds', 'doctors')
+def get_assignments():
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return []
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('''
+        SELECT a.assignment_id, p.name as patient_name, b.bed_id, b.ward, d.name as doctor_name, a.assignment_date
+        FROM assignments a
+        JOIN patients p ON a.patient_id = p.patient_id
+        JOIN beds b ON a.bed_id = b.bed_id
+        JOIN doctors d ON a.doctor_id = d.doctor_id
+    ''')
+    assignments = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return assignments
+
+# Column dtypes for DataFrames built by fetch_frame(). Low-cardinality text
+# becomes categorical; ids and ages are nullable integers. Columns not listed
+# stay as Python objects.
+FRAME_DTYPES = {
+    'patient_id': 'Int64',
+    'doctor_id': 'Int64',
+    'bed_id': 'Int64',
+    'assignment_id': 'Int64',
+    'age': 'Int64',
+    'gender': pd.CategoricalDtype(['Male', 'Female', 'Other']),
+    'status': pd.CategoricalDtype(BED_STATUSES),
+    'ward': 'category',
+    'specialty': 'category',
+    'admission_date': 'datetime64[ns]',
+    'assignment_date': 'datetime64[ns]',
+    'last_cleaned': 'datetime64[ns]',
+    'discharge_date': 'datetime64[ns]',
+    'archived_at': 'datetime64[ns]'
+}
+
+# Read an executed (tuple) cursor's result into a DataFrame column by column:
+# rows are fetched in chunks and each chunk is converted to typed columns
+# straight away, so no per-row dicts are built and the raw Python values of
+# only one chunk are alive at a time
+def fetch_frame(cursor, dtypes=None, chunk_size=FRAME_CHUNK_SIZE):
+    dtypes = FRAME_DTYPES if dtypes is None else dtypes
+    names = [column[0] for column in cursor.description]
+    parts = {name: [] for name in names}
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for name, values in zip(names, zip(*rows)):
+            parts[name].append(pd.Series(values, dtype=dtypes.get(name, object)))
+        del rows
+
+    columns = {}
+    for name in names:
+        dtype = dtypes.get(name, object)
+        if not parts[name]:
+            columns[name] = pd.Series([], dtype=dtype)
+        elif isinstance(dtype, str) and dtype == 'category':
+            # Chunks found different categories; merge them without decoding
+            columns[name] = pd.Series(pd.api.types.union_categoricals(parts[name]))
+        else:
+            columns[name] = pd.concat(parts[name], ignore_index=True)
+        parts[name] = None
+    return pd.DataFrame(columns)
+
+# Run a read-only query and return the result as a typed DataFrame
+def read_frame(query, params=None, dtypes=None):
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return pd.DataFrame()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        return fetch_frame(cursor, dtypes)
+    finally:
+        cursor.close()
+        conn.close()
+
+# Keyset pagination settings per list. Sort and filter columns are whitelisted
+# because they are interpolated into the SQL; values are always parameters.
+# Sort columns must be NOT NULL so that (sort value, key) seeks stay exact.
+PAGINATION = {
+    'patients': {
+        'select': 'SELECT patient_id, name, age, gender, contact, admission_date FROM patients',
+        'key': 'patient_id',
+        'key_field': 'patient_id',
+        'sort': {'patient_id': 'patient_id', 'name': 'name', 'age': 'age'},
+        'filters': {'gender': 'gender'}
+    },
+    'doctors': {
+        'select': 'SELECT doctor_id, name, specialty, contact FROM doctors',
+        'key': 'doctor_id',
+        'key_field': 'doctor_id',
+        'sort': {'doctor_id': 'doctor_id', 'name': 'name', 'specialty': 'specialty'},
+        'filters': {'specialty': 'specialty'}
+    },
+    'beds': {
+        'select': 'SELECT bed_id, ward, status, last_cleaned FROM beds',
+        'key': 'bed_id',
+        'key_field': 'bed_id',
+        # ENUM columns order by their index but compare to strings as text, so
+        # status is sorted and sought as text to keep both in the same order
+        'sort': {'bed_id': 'bed_id', 'ward': 'ward', 'status': 'CAST(status AS CHAR)'},
+        'filters': {'ward': 'ward', 'status': 'status'}
+    },
+    'assignments': {
+        'select': '''
+            SELECT a.assignment_id, p.name as patient_name, b.bed_id, b.ward, d.name as doctor_name, a.assignment_date
+            FROM assignments a
+            JOIN patients p ON a.patient_id = p.patient_id
+            JOIN beds b ON a.bed_id = b.bed_id
+            JOIN doctors d ON a.doctor_id = d.doctor_id
+        ''',
+        'key': 'a.assignment_id',
+        'key_field': 'assignment_id',
+        'sort': {'assignment_id': 'a.assignment_id', 'ward': 'b.ward'},
+        'filters': {'ward': 'b.ward'}
+    }
+}
+
+# One page of a list. `first`/`last` are the (sort value, key) cursors of the
+# page's edge rows, passed back as `before`/`after` to move between pages.
+Page = namedtuple('Page', ['rows', 'first', 'last', 'has_prev', 'has_next'])
+
+EMPTY_PAGE = Page([], None, None, False, False)
+
+# Fetch one page with keyset (seek) pagination on the primary key, so the
+# cost of a page does not grow with the size of the table
+def fetch_page(table, after=None, before=None, limit=PAGE_SIZE, filters=None, sort=None, descending=False):
+    spec = PAGINATION[table]
+    key, key_field = spec['key'], spec['key_field']
+    sort = sort or key_field
+    if sort not in spec['sort']:
+        raise ValueError(f"Cannot sort {table} by {sort}")
+    sort_expr = spec['sort'][sort]
+
+    where, params = [], []
+    for name, value in (filters or {}).items():
+        if name not in spec['filters']:
+            raise ValueError(f"Cannot filter {table} by {name}")
+        if value is None or value == '':
+            continue
+        where.append(f"{spec['filters'][name]} = %s")
+        params.append(value)
+
+    # Paging backwards seeks the other way and reverses the rows afterwards
+    backwards = before is not None
+    ascending = descending == backwards
+    op, order = ('>', 'ASC') if ascending else ('<', 'DESC')
+    seek = before if backwards else after
+    if seek is not None:
+        sort_value, key_value = seek
+        if sort_expr == key:
+            where.append(f"{key} {op} %s")
+            params.append(key_value)
+        else:
+            where.append(f"({sort_expr} {op} %s OR ({sort_expr} = %s AND {key} {op} %s))")
+            params.extend([sort_value, sort_value, key_value])
+
+    query = spec['select']
+    if where:
+        query += ' WHERE ' + ' AND '.join(where)
+    if sort_expr == key:
+        query += f' ORDER BY {key} {order}'
+    else:
+        query += f' ORDER BY {sort_expr} {order}, {key} {order}'
+    query += ' LIMIT %s'
+    params.append(limit + 1)
+
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return EMPTY_PAGE
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        if not has_more:
+            # Reached the start: show a full first page rather than a short one
+            return fetch_page(table, limit=limit, filters=filters, sort=sort, descending=descending)
+        rows.reverse()
+    if not rows:
+        return EMPTY_PAGE
+
+    first = (rows[0][sort], rows[0][key_field])
+    last = (rows[-1][sort], rows[-1][key_field])
+    if backwards:
+        return Page(rows, first, last, True, True)
+    return Page(rows, first, last, after is not None, has_more)
+
+# Paginated variants of the list helpers
+@cached_query('patients')
+def get_patients_page(after=None, before=None, limit=PAGE_SIZE, filters=None, sort=None, descending=False):
+    return fetch_page('patients', after, before, limit, filters, sort, descending)
+
+@cached_query('doctors')
+def get_doctors_page(after=None, before=None, limit=PAGE_SIZE, filters=None, sort=None, descending=False):
+    return fetch_page('doctors', after, before, limit, filters, sort, descending)
+
+@cached_query('beds')
+def get_beds_page(after=None, before=None, limit=PAGE_SIZE, filters=None, sort=None, descending=False):
+    return fetch_page('beds', after, before, limit, filters, sort, descending)
+
+@cached_query('assignments', 'patients', 'beds', 'doctors')
+def get_assignments_page(after=None, before=None, limit=PAGE_SIZE, filters=None, sort=None, descending=False):
+    return fetch_page('assignments', after, before, limit, filters, sort, descending)
+
+# Search settings per search type: selected columns, the FULLTEXT column
+# list, and the B-tree indexed columns used for short prefix searches
+SEARCH_SPECS = {
+    'Patient': {
+        'select': 'SELECT patient_id, name, age, gender, contact, admission_date FROM patients',
+        'match': 'name',
+        'prefix': ['name'],
+        'key': 'patient_id'
+    },
+    'Doctor': {
+        'select': 'SELECT doctor_id, name, specialty, contact FROM doctors',
+        'match': 'name, specialty',
+        'prefix': ['name', 'specialty'],
+        'key': 'doctor_id'
+    },
+    'Bed': {
+        'select': 'SELECT bed_id, ward, status, last_cleaned FROM beds',
+        'match': 'ward',
+        'prefix': ['ward'],
+        'key': 'bed_id'
+    }
+}
+
+# Characters with special meaning in boolean-mode full-text queries
+FULLTEXT_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+# Escape LIKE wildcards so user input only matches literally
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+# Build the ranked search query for a term. Every word must match as a word
+# prefix, so partial input ("joh smi") finds "John Smith" as the user types.
+def build_search_query(spec, search_term, limit):
+    words = FULLTEXT_OPERATORS.sub(' ', search_term).split()
+    if words and min(len(word) for word in words) >= FULLTEXT_MIN_TOKEN_SIZE:
+        against = ' '.join(f'+{word}*' for word in words)
+        match = f"MATCH({spec['match']}) AGAINST (%s IN BOOLEAN MODE)"
+        query = f"{spec['select']} WHERE {match} ORDER BY {match} DESC, {spec['key']} LIMIT %s"
+        return query, (against, against, limit)
+
+    # Too short for the full-text index: indexed prefix match, alphabetical
+    prefix = escape_like(search_term) + '%'
+    condition = ' OR '.join(f'{column} LIKE %s' for column in spec['prefix'])
+    query = f"{spec['select']} WHERE {condition} ORDER BY {spec['prefix'][0]}, {spec['key']} LIMIT %s"
+    return query, (prefix,) * len(spec['prefix']) + (limit,)
+
+# Search function: ranked, indexed search returning at most `limit` rows
+def search_data(search_type, search_term, limit=SEARCH_RESULT_LIMIT):
+    spec = SEARCH_SPECS.get(search_type)
+    search_term = (search_term or '').strip()
+    if not spec or not search_term:
+        return pd.DataFrame()
+
+    if search_type == "Bed" and search_term.lower() in BED_STATUSES:
+        query = f"{spec['select']} WHERE status = %s ORDER BY ward, bed_id LIMIT %s"
+        params = (search_term.lower(), limit)
+    else:
+        query, params = build_search_query(spec, search_term, limit)
+
+    return read_frame(query, params)
+
+# Bulk import settings per table: source columns, the validator shared with
+# the add_* helpers, and the INSERT prefix and per-row VALUES template
+IMPORT_SPECS = {
+    'patients': {
+        'columns': ['name', 'age', 'gender', 'contact'],
+        'validate': validate_patient,
+        'insert': 'INSERT INTO patients (name, age, gender, contact, admission_date) VALUES ',
+        'row': '(%s, %s, %s, %s, NOW())'
+    },
+    'doctors': {
+        'columns': ['name', 'specialty', 'contact'],
+        'validate': validate_doctor,
+        'insert': 'INSERT INTO doctors (name, specialty, contact) VALUES ',
+        'row': '(%s, %s, %s)'
+    },
+    'beds': {
+        'columns': ['ward', 'status'],
+        'validate': validate_bed,
+        'insert': 'INSERT INTO beds (ward, status, last_cleaned) VALUES ',
+        'row': '(%s, %s, NOW())',
+        'on_insert': lambda conn, ids: record_bed_events(conn, ids, 'added')
+    }
+}
+
+# Stream records from a CSV file as dicts, one row at a time
+def iter_csv_records(file):
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(file)
+
+# Stream records from a Parquet file one record batch at a time
+def iter_parquet_records(file, batch_size=IMPORT_BATCH_SIZE):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import requires the pyarrow package")
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+# Pick the record reader from the file name
+def iter_import_records(file, filename):
+    if filename.lower().endswith('.parquet'):
+        return iter_parquet_records(file)
+    return iter_csv_records(file)
+
+# Normalise an imported cell: strip text and treat blanks as missing
+def clean_import_value(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+# Stream records into `table` using batched multi-row INSERTs, one transaction
+# per batch. Invalid rows are reported and skipped; a batch the database
+# rejects is retried row by row so only the offending rows fail.
+def bulk_import(table, records, batch_size=IMPORT_BATCH_SIZE):
+    spec = IMPORT_SPECS[table]
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def record_error(row_number, message):
+        report['failed'] += 1
+        if len(report['errors']) < IMPORT_MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'error': message})
+
     conn = get_db_connection()
     if not conn:
-        return False, "Database connection failed"
+        record_error(0, "Database connection failed")
+        return report
     cursor = conn.cursor()
-    
+    batch = []
+
+    # Tables that need the new ids insert row by row, still in one transaction
+    # per batch: a multi-row INSERT's ids are only consecutive under some
+    # auto-increment settings, and lastrowid gives just the first
+    def insert_batch():
+        if 'on_insert' not in spec:
+            cursor.execute(spec['insert'] + ', '.join([spec['row']] * len(batch)),
+                           [value for _, values in batch for value in values])
+            return
+        ids = []
+        for _, values in batch:
+            cursor.execute(spec['insert'] + spec['row'], values)
+            ids.append(cursor.lastrowid)
+        spec['on_insert'](conn, ids)
+
+    def flush():
+        try:
+            insert_batch()
+            conn.commit()
+            report['imported'] += len(batch)
+        except mysql.connector.Error:
+            conn.rollback()
+            for row_number, values in batch:
+                try:
+                    cursor.execute(spec['insert'] + spec['row'], values)
+                    if 'on_insert' in spec:
+                        spec['on_insert'](conn, [cursor.lastrowid])
+                    conn.commit()
+                    report['imported'] += 1
+                except mysql.connector.Error as err:
+                    conn.rollback()
+                    record_error(row_number, f"Error: {err}")
+        batch.clear()
+
     try:
-        cursor.execute('DELETE FROM doctors WHERE doctor_id = %s', (doctor_id,))
-        if cursor.rowcount == 0:
-            return False, "Doctor not found"
-        conn.commit()
-        return True, "Doctor deleted successfully"
-    except mysql.connector.Error as err:
-        return False, f"Error: {err}"
+        # Row numbers count data rows from 1, excluding any header line
+        for row_number, record in enumerate(records, start=1):
+            error, values = spec['validate'](*(clean_import_value(record.get(column)) for column in spec['columns']))
+            if error:
+                record_error(row_number, error)
+                continue
+            batch.append((row_number, values))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
     finally:
         cursor.close()
         conn.close()
+        if report['imported']:
+            invalidate_cache(table)
+            if table == 'beds':
+                _bed_index().invalidate()
+    return report
 
-# Get doctors
-def get_doctors():
-    conn = get_db_connection()
-    if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute('SELECT * FROM doctors')
-    doctors = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return doctors
+# Export settings per extract: the query and each output column's type, used
+# for the Parquet schema
+EXPORT_SPECS = {
+    'patients': {
+        'query': 'SELECT patient_id, name, age, gender, contact, admission_date FROM patients ORDER BY patient_id',
+        'columns': [('patient_id', 'int'), ('name', 'text'), ('age', 'int'), ('gender', 'text'),
+                    ('contact', 'text'), ('admission_date', 'timestamp')]
+    },
+    'beds': {
+        'query': 'SELECT bed_id, ward, status, last_cleaned FROM beds ORDER BY bed_id',
+        'columns': [('bed_id', 'int'), ('ward', 'text'), ('status', 'text'), ('last_cleaned', 'timestamp')]
+    },
+    'assignments': {
+        'query': '''
+            SELECT a.assignment_id, a.patient_id, p.name AS patient_name, b.bed_id, b.ward,
+                   a.doctor_id, d.name AS doctor_name, a.assignment_date
+            FROM assignments a
+            JOIN patients p ON a.patient_id = p.patient_id
+            JOIN beds b ON a.bed_id = b.bed_id
+            JOIN doctors d ON a.doctor_id = d.doctor_id
+            ORDER BY a.assignment_id
+        ''',
+        'columns': [('assignment_id', 'int'), ('patient_id', 'int'), ('patient_name', 'text'), ('bed_id', 'int'),
+                    ('ward', 'text'), ('doctor_id', 'int'), ('doctor_name', 'text'),
+                    ('assignment_date', 'timestamp')]
+    }
+}
 
-# Add bed
-def add_bed(ward, status):
-    if not ward or not status:
-        return False, "Ward and status are required"
-    
-    if status not in ['available', 'occupied', 'maintenance']:
-        return False, "Status must be available, occupied, or maintenance"
-    
-    conn = get_db_connection()
+EXPORT_FORMATS = ['csv', 'parquet']
+EXPORT_COMPRESSIONS = [None, 'gzip', 'zstd']
+
+# Wrap a binary output stream in a compressor; returns (stream, finish) where
+# finish() flushes the compressed trailer without closing the underlying file
+def open_compressed(out, compression):
+    if compression is None:
+        return out, out.flush
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=out, mode='wb')
+        return stream, stream.close
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression requires the zstandard package")
+        stream = zstandard.ZstdCompressor().stream_writer(out, closefd=False)
+        return stream, stream.close
+    raise ValueError(f"Unknown compression: {compression}")
+
+# Stream an extract into the binary file `out` as CSV (optionally compressed)
+# or Parquet (one row group per chunk, compressed internally). Rows come
+# through an unbuffered cursor EXPORT_CHUNK_SIZE at a time, so memory use
+# does not grow with the table. Returns the number of rows written.
+def export_table(table, out, fmt='csv', compression=None, chunk_size=EXPORT_CHUNK_SIZE):
+    spec = EXPORT_SPECS[table]
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    names = [name for name, _ in spec['columns']]
+    if fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires the pyarrow package")
+        arrow_types = {'int': pa.int64(), 'text': pa.string(), 'timestamp': pa.timestamp('s')}
+        schema = pa.schema([(name, arrow_types[kind]) for name, kind in spec['columns']])
+
+    conn = get_db_connection(read_only=True)
     if not conn:
-        return False, "Database connection failed"
-    cursor = conn.cursor()
-    
+        raise mysql.connector.errors.OperationalError("Database connection failed")
+    cursor = conn.cursor(buffered=False)
+    rows_written = 0
     try:
-        cursor.execute('''
-            INSERT INTO beds (ward, status, last_cleaned)
-            VALUES (%s, %s, NOW())
-        ''', (ward, status))
-        conn.commit()
-        return True, "Bed added successfully"
-    except mysql.connector.Error as err:
-        return False, f"Error: {err}"
+        cursor.execute(spec['query'])
+        if fmt == 'parquet':
+            writer = pq.ParquetWriter(out, schema, compression=compression or 'none')
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    columns = [list(values) for values in zip(*rows)]
+                    writer.write_table(pa.Table.from_arrays(
+                        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                        schema=schema))
+                    rows_written += len(rows)
+            finally:
+                writer.close()
+        else:
+            stream, finish = open_compressed(out, compression)
+            text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+            writer = csv.writer(text)
+            writer.writerow(names)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                rows_written += len(rows)
+            text.detach()  # leave `stream` open for finish()
+            finish()
     finally:
         cursor.close()
         conn.close()
+    return rows_written
 
-# Delete bed
-def delete_bed(bed_id):
-    conn = get_db_connection()
+# Conventional file name for an extract
+def export_filename(table, fmt, compression):
+    suffix = {'gzip': '.gz', 'zstd': '.zst'}.get(compression, '') if fmt == 'csv' else ''
+    return f"{table}_{datetime.now():%Y%m%d}.{fmt}{suffix}"
+
+# Typeahead lookup returning (id, name) pairs for the top matches: numeric
+# input matches the ID exactly, text goes through the ranked search, and an
+# empty term lists the newest rows
+def find_options(search_type, table, key, term, limit=TYPEAHEAD_LIMIT):
+    term = (term or '').strip()
+    if term and not term.isdigit():
+        df = search_data(search_type, term, limit)
+        # Plain ints: the frame's ids are pandas scalars, which the connector
+        # does not reliably accept as parameters
+        if df.empty:
+            return []
+        return [(int(option_id), name) for option_id, name in df[[key, 'name']].itertuples(index=False, name=None)]
+
+    conn = get_db_connection(read_only=True)
     if not conn:
-        return False, "Database connection failed"
+        return []
     cursor = conn.cursor()
-    
     try:
-        cursor.execute('DELETE FROM beds WHERE bed_id = %s', (bed_id,))
-        if cursor.rowcount == 0:
-            return False, "Bed not found"
-        conn.commit()
-        return True, "Bed deleted successfully"
-    except mysql.connector.Error as err:
-        return False, f"Error: {err}"
+        if term:
+            cursor.execute(f'SELECT {key}, name FROM {table} WHERE {key} = %s', (int(term),))
+        else:
+            cursor.execute(f'SELECT {key}, name FROM {table} ORDER BY {key} DESC LIMIT %s', (limit,))
+        return cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
-# Get beds
-def get_beds():
-    conn = get_db_connection()
-    if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute('SELECT * FROM beds')
-    beds = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return beds
+@cached_query('patients')
+def find_patient_options(term, limit=TYPEAHEAD_LIMIT):
+    return find_options("Patient", 'patients', 'patient_id', term, limit)
 
-# Get available beds
-def get_available_beds():
-    conn = get_db_connection()
-    if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute('SELECT * FROM beds WHERE status = "available"')
-    beds = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return beds
+@cached_query('doctors')
+def find_doctor_options(term, limit=TYPEAHEAD_LIMIT):
+    return find_options("Doctor", 'doctors', 'doctor_id', term, limit)
 
-# Create assignment
-def create_assignment(patient_id, bed_id, doctor_id):
-    if not patient_id or not bed_id or not doctor_id:
-        return False, "Please select a patient, bed, and doctor"
-    
-    conn = get_db_connection()
+# Available beds matching a ward name or bed ID, served from the bed index
+def find_bed_options(term, limit=TYPEAHEAD_LIMIT):
+    return [(bed['bed_id'], bed['ward']) for bed in get_bed_index().find_available(term, limit)]
+
+# Dashboard metrics snapshot: every count and the per-ward bed breakdown in one
+# aggregate query. Cached process-wide and invalidated by the write paths; the
+# TTL only matters for writes made by other processes.
+@cached_query('patients', 'doctors', 'beds', 'assignments', ttl=60)
+def get_dashboard_metrics():
+    conn = get_db_connection(read_only=True)
     if not conn:
-        return False, "Database connection failed"
+        raise mysql.connector.errors.OperationalError("Database connection failed")
     cursor = conn.cursor(dictionary=True)
-    
     try:
-        cursor.execute('SELECT status FROM beds WHERE bed_id = %s', (bed_id,))
-        bed = cursor.fetchone()
-        if not bed or bed['status'] != 'available':
-            return False, "Selected bed is not available"
-        
         cursor.execute('''
-            INSERT INTO assignments (patient_id, bed_id, doctor_id, assignment_date)
-            VALUES (%s, %s, %s, NOW())
-        ''', (patient_id, bed_id, doctor_id))
-        
-        cursor.execute('UPDATE beds SET status = "occupied" WHERE bed_id = %s', (bed_id,))
-        
-        conn.commit()
-        return True, "Assignment created successfully"
-    except mysql.connector.Error as err:
-        return False, f"Error: {err}"
+            SELECT t.patient_count, t.doctor_count, t.assignment_count,
+                   w.ward, w.available, w.occupied, w.maintenance, w.cleaning
+            FROM (
+                SELECT (SELECT COUNT(*) FROM patients) AS patient_count,
+                       (SELECT COUNT(*) FROM doctors) AS doctor_count,
+                       (SELECT COUNT(*) FROM assignments) AS assignment_count
+            ) t
+            LEFT JOIN (
+                SELECT ward,
+                       SUM(status = 'available') AS available,
+                       SUM(status = 'occupied') AS occupied,
+                       SUM(status = 'maintenance') AS maintenance,
+                       SUM(status = 'cleaning') AS cleaning
+                FROM beds
+                GROUP BY ward
+            ) w ON 1 = 1
+            ORDER BY w.ward
+        ''')
+        rows = cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
-# Delete assignment
-def delete_assignment(assignment_id):
-    conn = get_db_connection()
+    wards = [
+        {'ward': row['ward'], 'available': int(row['available']), 'occupied': int(row['occupied']),
+         'maintenance': int(row['maintenance']), 'cleaning': int(row['cleaning'])}
+        for row in rows if row['ward'] is not None
+    ]
+    return {
+        'patient_count': rows[0]['patient_count'],
+        'doctor_count': rows[0]['doctor_count'],
+        'assignment_count': rows[0]['assignment_count'],
+        'bed_count': sum(w['available'] + w['occupied'] + w['maintenance'] + w['cleaning'] for w in wards),
+        'available_bed_count': sum(w['available'] for w in wards),
+        'wards': wards,
+        'generated_at': datetime.now()
+    }
+
+# Occupancy analytics for the last `days` days, computed from the hourly
+# rollups only: occupancy per ward for every hour (carried forward across
+# hours without events), mean occupancy and admissions by hour of day, and
+# average length of stay per ward
+@cached_query('occupancy_hourly', ttl=OCCUPANCY_CACHE_SECONDS)
+def get_occupancy_analytics(days=30):
+    end = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    conn = get_db_connection(read_only=True)
     if not conn:
-        return False, "Database connection failed"
-    cursor = conn.cursor()
-    
+        raise mysql.connector.errors.OperationalError("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute('SELECT bed_id FROM assignments WHERE assignment_id = %s', (assignment_id,))
-        result = cursor.fetchone()
-        if not result:
-            return False, "Assignment not found"
-        
-        bed_id = result[0]
-        
-        cursor.execute('DELETE FROM assignments WHERE assignment_id = %s', (assignment_id,))
-        cursor.execute('UPDATE beds SET status = "available" WHERE bed_id = %s', (bed_id,))
-        
-        conn.commit()
-        return True, "Assignment deleted successfully"
-    except mysql.connector.Error as err:
-        return False, f"Error: {err}"
+        # The window's rollups, plus each ward's last rollup before the window
+        # as its starting occupancy
+        cursor.execute('''
+            SELECT ward, hour_start, admissions, discharges, stay_seconds, occupied, 1 AS in_window
+            FROM occupancy_hourly
+            WHERE hour_start >= %s
+            UNION ALL
+            SELECT h.ward, %s, 0, 0, 0, h.occupied, 0
+            FROM occupancy_hourly h
+            JOIN (
+                SELECT ward, MAX(hour_start) AS hour_start
+                FROM occupancy_hourly
+                WHERE hour_start < %s
+                GROUP BY ward
+            ) p ON h.ward = p.ward AND h.hour_start = p.hour_start
+        ''', (start, start, start))
+        rows = cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
-# Get assignments
-def get_assignments():
-    conn = get_db_connection()
-    if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute('''
-        SELECT a.assignment_id, p.name as patient_name, b.bed_id, b.ward, d.name as doctor_name, a.assignment_date
-        FROM assignments a
-        JOIN patients p ON a.patient_id = p.patient_id
-        JOIN beds b ON a.bed_id = b.bed_id
-        JOIN doctors d ON a.doctor_id = d.doctor_id
-    ''')
-    assignments = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return assignments
+    if not rows:
+        return None
+    df = pd.DataFrame(rows)
+    df['hour_start'] = pd.to_datetime(df['hour_start'])
+    for column in ('admissions', 'discharges', 'stay_seconds', 'occupied'):
+        df[column] = df[column].astype('int64')
+    hours = pd.date_range(start, end, freq='h')
+    # A window rollup in the first hour supersedes the carried-in occupancy
+    df = df.sort_values(['hour_start', 'in_window'])
+    occupancy = (df.groupby(['hour_start', 'ward'])['occupied'].last().unstack('ward')
+                 .reindex(hours).ffill().fillna(0).astype('int64'))
+    occupancy.index.name = 'hour'
 
-# Search function
-def search_data(search_type, search_term):
-    conn = get_db_connection()
-    if not conn:
+    window = df[df['in_window'] == 1]
+    hour_of_day = occupancy.index.hour
+    by_hour = pd.DataFrame({
+        'mean_occupied': occupancy.sum(axis=1).groupby(hour_of_day).mean().round(1),
+        'admissions': window.groupby(window['hour_start'].dt.hour)['admissions'].sum()
+    }).reindex(range(24)).fillna(0)
+    by_hour.index.name = 'hour_of_day'
+
+    stays = window.groupby('ward')[['discharges', 'stay_seconds']].sum()
+    stays = stays[stays['discharges'] > 0]
+    length_of_stay = pd.DataFrame({
+        'discharges': stays['discharges'],
+        'average_stay_hours': (stays['stay_seconds'] / stays['discharges'] / 3600).round(1)
+    })
+    return {
+        'occupancy': occupancy,
+        'by_hour': by_hour,
+        'peak_hour': int(by_hour['mean_occupied'].idxmax()),
+        'length_of_stay': length_of_stay,
+        'admissions': int(window['admissions'].sum()),
+        'discharges': int(window['discharges'].sum()),
+        'generated_at': datetime.now()
+    }
+
+# Forecast hourly admissions for every series (ward) in `counts`, a frame of
+# (series, hour_offset, admissions) rows where hour_offset counts hours since
+# `start` and the history covers `days` whole days. All series are handled at
+# once with array operations:
+#   - seasonal averages give each series a day-of-week factor and, for each
+#     day of the week, the share of that day's admissions in each hour;
+#   - exponential smoothing of the deseasonalised daily totals gives the
+#     current daily level;
+#   - an hour's forecast is level * day-of-week factor * hour share.
+# Returns expected admissions indexed by series, one column per hour of the
+# `horizon_hours` starting at the current hour of `now`.
+def forecast_demand(counts, start, days, now, horizon_hours=168, smoothing=0.1):
+    if counts.empty:
         return pd.DataFrame()
-    cursor = conn.cursor(dictionary=True)
-    
-    if search_type == "Patient":
-        cursor.execute('SELECT patient_id, name, age, gender, contact, admission_date FROM patients WHERE name LIKE %s', (f'%{search_term}%',))
-        results = cursor.fetchall()
-        df = pd.DataFrame(results)
-    elif search_type == "Doctor":
-        cursor.execute('SELECT doctor_id, name, specialty, contact FROM doctors WHERE specialty LIKE %s OR name LIKE %s', 
-                      (f'%{search_term}%', f'%{search_term}%'))
-        results = cursor.fetchall()
-        df = pd.DataFrame(results)
-    elif search_type == "Bed":
-        cursor.execute('SELECT bed_id, ward, status, last_cleaned FROM beds WHERE ward LIKE %s OR status = %s', 
-                      (f'%{search_term}%', search_term))
-        results = cursor.fetchall()
-        df = pd.DataFrame(results)
-    else:
-        df = pd.DataFrame()
-    
-    cursor.close()
-    conn.close()
-    return df
+    codes, names = pd.factorize(counts['series'], sort=True)
+    offsets = counts['hour_offset'].to_numpy(dtype='int64')
+    weights = counts['admissions'].to_numpy(dtype='float64')
+    day = offsets // 24
+    keep = (codes >= 0) & (day >= 0) & (day < days)
+    codes, day, offsets, weights = codes[keep], day[keep], offsets[keep], weights[keep]
+    series_count = len(names)
+
+    weekday = (start.weekday() + np.arange(days)) % 7  # weekday of each history day
+    daily = np.bincount(codes * days + day, weights, minlength=series_count * days).reshape(series_count, days)
+    slot = weekday[day] * 24 + offsets % 24
+    weekly = np.bincount(codes * 168 + slot, weights, minlength=series_count * 168).reshape(series_count, 7, 24)
+
+    per_weekday = weekly.sum(axis=2) / np.maximum(np.bincount(weekday, minlength=7), 1)
+    mean_daily = daily.mean(axis=1, keepdims=True)
+    day_factor = np.divide(per_weekday, mean_daily, out=np.ones_like(per_weekday), where=mean_daily > 0)
+    day_totals = weekly.sum(axis=2, keepdims=True)
+    hour_share = np.divide(weekly, day_totals, out=np.full_like(weekly, 1 / 24), where=day_totals > 0)
+
+    # Days on a weekday that never sees admissions say nothing about the level
+    factors = day_factor[:, weekday]
+    deseasonalised = np.divide(daily, factors, out=np.full_like(daily, np.nan), where=factors > 0)
+    level = (pd.DataFrame(deseasonalised.T).ewm(alpha=smoothing, adjust=False, ignore_na=True).mean()
+             .iloc[-1].fillna(0).to_numpy())
+
+    hours = pd.date_range(now.replace(minute=0, second=0, microsecond=0), periods=horizon_hours, freq='h')
+    future_weekday = hours.weekday.to_numpy()
+    future_hour = hours.hour.to_numpy()
+    expected = level[:, None] * day_factor[:, future_weekday] * hour_share[:, future_weekday, future_hour]
+    return pd.DataFrame(expected, index=pd.Index(names, name='series'), columns=hours)
+
+# Next-24-hour and next-7-day totals, and the busiest coming hour, per series
+def forecast_totals(expected):
+    next_day = expected.iloc[:, :24]
+    return pd.DataFrame({
+        'next_24h': next_day.sum(axis=1).round(1),
+        'next_7d': expected.iloc[:, :168].sum(axis=1).round(1),
+        'peak_hour': next_day.idxmax(axis=1)
+    })
+
+FORECAST_COUNT_DTYPES = {'series': object, 'hour_offset': 'int64', 'admissions': 'int64'}
+
+# Admission forecasts for the Dashboard: bed admissions per ward (current and
+# archived assignments), with the hospital-wide figures summed from the same
+# ward forecasts, from FORECAST_CONFIG['history_days'] whole days of history
+# aggregated to hourly counts in the database. Cached for
+# FORECAST_CONFIG['cache_seconds'] rather than invalidated on every admission.
+@cached_query(ttl=FORECAST_CONFIG['cache_seconds'])
+def get_demand_forecast():
+    days = FORECAST_CONFIG['history_days']
+    now = datetime.now()
+    end = now.replace(hour=0, minute=0, second=0, microsecond=0)  # today is still incomplete
+    start = end - timedelta(days=days)
+    # History rows are pruned by discharge_date: a stay ends after it starts
+    ward_counts = read_frame('''
+        SELECT ward AS series, TIMESTAMPDIFF(HOUR, %s, admitted) AS hour_offset, COUNT(*) AS admissions
+        FROM (
+            SELECT b.ward, a.assignment_date AS admitted
+            FROM assignments a
+            JOIN beds b ON a.bed_id = b.bed_id
+            WHERE a.assignment_date >= %s AND a.assignment_date < %s
+            UNION ALL
+            SELECT ward, assignment_date
+            FROM assignment_history
+            WHERE discharge_date >= %s AND assignment_date >= %s AND assignment_date < %s AND ward IS NOT NULL
+        ) s
+        GROUP BY series, hour_offset
+    ''', (start, start, end, start, start, end), FORECAST_COUNT_DTYPES)
+    if ward_counts.empty:
+        return None
+    smoothing = FORECAST_CONFIG['smoothing']
+    wards = forecast_demand(ward_counts, start, days, now, smoothing=smoothing)
+    totals = forecast_totals(wards)
+    totals.index.name = 'ward'
+    return {
+        'wards': totals.sort_values('next_24h', ascending=False),
+        'admissions_by_hour': wards.iloc[:, :24].sum(axis=0).round(2),
+        'hospital_24h': float(totals['next_24h'].sum()),
+        'hospital_7d': float(totals['next_7d'].sum()),
+        'history_start': start,
+        'generated_at': datetime.now()
+    }
+
+# Run a batch mutation and keep its report for the next rerun, so per-item
+# outcomes survive the refresh that shows the changed list
+def run_batch_action(state_key, summary, func, *args, **kwargs):
+    st.session_state[state_key] = (summary, func(*args, **kwargs))
+    st.rerun()
+
+# Show (once) the report stored by run_batch_action under `state_key`
+def render_batch_report(state_key):
+    summary, report = st.session_state.pop(state_key, (None, None))
+    if report is None:
+        return
+    if report['error']:
+        st.error(report['error'])
+        return
+    st.success(summary.format(count=len(report['succeeded'])))
+    if report['skipped']:
+        st.warning(f"{len(report['skipped'])} skipped")
+        df = pd.DataFrame(report['skipped'])
+        df.columns = ['ID', 'Reason']
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+# Render one page of a list with filter/sort controls and Previous/Next
+# buttons. The page cursor lives in session state under `state_key`.
+def render_paginated_list(state_key, fetch, columns, labels, sort_options, filter_options=None):
+    filters = {}
+    controls = st.columns(len(filter_options or {}) + 2)
+    for col, (name, choices) in zip(controls, (filter_options or {}).items()):
+        label = name.replace('_', ' ').title()
+        if choices:
+            value = col.selectbox(label, ["All"] + choices, key=f"{state_key}_filter_{name}")
+            filters[name] = None if value == "All" else value
+        else:
+            filters[name] = col.text_input(label, placeholder="All", key=f"{state_key}_filter_{name}").strip()
+    sort = controls[-2].selectbox("Sort by", sort_options, key=f"{state_key}_sort")
+    descending = controls[-1].selectbox("Order", ["Ascending", "Descending"], key=f"{state_key}_order") == "Descending"
+
+    # Changing filters or sort order starts again from the first page
+    view = (tuple(sorted(filters.items())), sort, descending)
+    state = st.session_state.get(state_key)
+    if not state or state['view'] != view:
+        state = {'view': view, 'after': None, 'before': None}
+        st.session_state[state_key] = state
+
+    page = fetch(after=state['after'], before=state['before'], filters=filters, sort=sort, descending=descending)
+    if page.rows:
+        df = pd.DataFrame(page.rows)
+        df = df[columns]
+        df.columns = labels
+        st.dataframe(df, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    if col1.button("Previous", disabled=not page.has_prev, key=f"{state_key}_prev"):
+        state.update(after=None, before=page.first)
+        st.rerun()
+    if col2.button("Next", disabled=not page.has_next, key=f"{state_key}_next"):
+        state.update(after=page.last, before=None)
+        st.rerun()
+    return page
+
+# Render the live bed board. The session keeps the beds it last showed and
+# the feed version they reflect, so each refresh fetches only newer events.
+def render_bed_board():
+    board = st.session_state.get('bed_board')
+    applied = None
+    if board is not None:
+        batch = read_bed_feed(board['version'])
+        if batch is None:
+            st.warning("Could not fetch bed changes; showing the last known state")
+        elif batch.reload:
+            board = None  # too far behind the feed: reload in full
+        else:
+            apply_bed_events(board['beds'], batch.events)
+            board['version'] = batch.watermark
+            applied = len(batch.events)
+    if board is None:
+        snapshot = get_bed_snapshot()
+        if snapshot is None:
+            st.error("Could not load beds")
+            return
+        version, rows = snapshot
+        board = {'version': version, 'beds': {row['bed_id']: row for row in rows}}
+        st.session_state.bed_board = board
+
+    if not board['beds']:
+        st.write("No beds found")
+        return
+    df = pd.DataFrame(list(board['beds'].values()))
+    summary = df.groupby(['ward', 'status']).size().unstack(fill_value=0)
+    summary = summary.reindex(columns=BED_STATUSES, fill_value=0)
+    summary.index.name = 'Ward'
+    summary.columns = [status.title() for status in BED_STATUSES]
+    st.dataframe(summary, use_container_width=True)
+
+    wards = sorted(df['ward'].unique())
+    ward = st.selectbox("Ward", ["All"] + wards, key="bed_board_ward")
+    if ward != "All":
+        df = df[df['ward'] == ward]
+    df = df.sort_values('bed_id')[['bed_id', 'ward', 'status', 'last_cleaned']]
+    df.columns = ['ID', 'Ward', 'Status', 'Last Cleaned']
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    changes = "full reload" if applied is None else f"{applied} changes applied"
+    st.caption(f"Feed version {board['version']} · {changes} · updated {datetime.now():%H:%M:%S}")
 
 # Main Streamlit app
 def main():
-    init_db()
+    try:
+        ensure_schema()
+    except RuntimeError:
+        pass  # error already shown; retried on the next rerun
+    else:
+        start_archiver()
     
     # Initialize session state
     if 'user' not in st.session_state:
@@ -767,9 +3799,11 @@ def main():
     # Main app
     elif st.session_state.user:
         st.sidebar.markdown(f"<h2>Welcome, {st.session_state.user['name']}</h2>", unsafe_allow_html=True)
-        page = st.sidebar.selectbox("Navigate", 
-                                   ["Dashboard", "Patients", "Doctors", "Beds", "Assignments", "Search", "Logout"],
-                                   format_func=lambda x: f"{x}")
+        pages = ["Dashboard", "Patients", "Doctors", "Beds", "Bed Board", "Housekeeping", "Assignments", "Analytics",
+                 "History", "Search", "Import", "Export"]
+        if st.session_state.user.get('is_admin'):
+            pages.append("Diagnostics")
+        page = st.sidebar.selectbox("Navigate", pages + ["Logout"], format_func=lambda x: f"{x}", key="nav_page")
         
         if page == "Logout":
             st.session_state.user = None
@@ -781,28 +3815,71 @@ def main():
         elif page == "Dashboard":
             st.title("Dashboard")
             st.markdown("### Overview")
-            conn = get_db_connection()
-            if conn:
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute('SELECT COUNT(*) as count FROM patients')
-                patient_count = cursor.fetchone()['count']
-                cursor.execute('SELECT COUNT(*) as count FROM doctors')
-                doctor_count = cursor.fetchone()['count']
-                cursor.execute('SELECT COUNT(*) as count FROM beds')
-                bed_count = cursor.fetchone()['count']
-                cursor.execute('SELECT COUNT(*) as count FROM beds WHERE status = "available"')
-                available_bed_count = cursor.fetchone()['count']
-                cursor.execute('SELECT COUNT(*) as count FROM assignments')
-                assignment_count = cursor.fetchone()['count']
-                cursor.close()
-                conn.close()
-                
+            # The forecast reads weeks of history when its cache expires, so
+            # it is loaded alongside the counts rather than after them
+            (metrics, metrics_error), (forecast, forecast_error) = run_concurrently(
+                functools.partial(result_or_error, get_dashboard_metrics),
+                functools.partial(result_or_error, get_demand_forecast)
+            )
+            if metrics_error:
+                st.error(f"Error loading dashboard metrics: {metrics_error}")
+            if metrics:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Total Patients", metrics['patient_count'])
+                col2.metric("Total Doctors", metrics['doctor_count'])
+                col3.metric("Total Beds", metrics['bed_count'])
+                col1.metric("Available Beds", metrics['available_bed_count'])
+                col2.metric("Assignments", metrics['assignment_count'])
+
+                if metrics['wards']:
+                    st.markdown("### Beds by Ward")
+                    df = pd.DataFrame(metrics['wards'])
+                    df.columns = ['Ward', 'Available', 'Occupied', 'Maintenance', 'Cleaning']
+                    st.dataframe(df, use_container_width=True)
+                st.caption(f"Last updated {metrics['generated_at']:%Y-%m-%d %H:%M:%S}")
+            
+            st.markdown("### Admissions Forecast")
+            if forecast_error:
+                st.error(f"Error loading forecast: {forecast_error}")
+            elif forecast:
+                col1, col2 = st.columns(2)
+                col1.metric("Expected Admissions (24h)", f"{forecast['hospital_24h']:.0f}")
+                col2.metric("Expected Admissions (7 days)", f"{forecast['hospital_7d']:.0f}")
+                st.caption("Expected admissions per hour over the next 24 hours, all wards")
+                st.line_chart(forecast['admissions_by_hour'])
+                df = forecast['wards'].reset_index()
+                free_beds = {w['ward']: w['available'] for w in metrics['wards']} if metrics else {}
+                df['free_beds'] = df['ward'].map(free_beds)
+                df['peak_hour'] = df['peak_hour'].map(lambda hour: f"{hour:%a %H:00}")
+                df.columns = ['Ward', 'Next 24h', 'Next 7 Days', 'Busiest Hour', 'Free Beds Now']
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                st.caption(f"Seasonal averages with exponentially smoothed levels, from admissions since "
+                           f"{forecast['history_start']:%Y-%m-%d}. Updated {forecast['generated_at']:%H:%M}.")
+            elif forecast is None:
+                st.write("No admission history to forecast from yet")
+            
+            with st.expander("Query cache statistics"):
+                stats = get_query_cache().stats()
                 col1, col2, col3 = st.columns(3)
-                col1.metric("Total Patients", patient_count)
-                col2.metric("Total Doctors", doctor_count)
-                col3.metric("Total Beds", bed_count)
-                col1.metric("Available Beds", available_bed_count)
-                col2.metric("Assignments", assignment_count)
+                col1.metric("Hit Ratio", f"{stats['hit_ratio']:.0%}")
+                col2.metric("Cached Entries", f"{stats['entries']} / {stats['max_entries']}")
+                col3.metric("Evictions", stats['evictions'])
+                if stats['functions']:
+                    df = pd.DataFrame([
+                        {'Function': name, 'Hits': c['hits'], 'Misses': c['misses']}
+                        for name, c in sorted(stats['functions'].items())
+                    ])
+                    st.dataframe(df, use_container_width=True)
+            
+            if DB_REPLICAS:
+                with st.expander("Read replicas"):
+                    replicas = get_replica_set().stats()
+                    col1, col2 = st.columns(2)
+                    col1.metric("Reads on Replicas", replicas['routed'].get('replica', 0))
+                    col2.metric("Reads on Primary", replicas['routed'].get('primary', 0))
+                    df = pd.DataFrame(replicas['replicas'])
+                    df.columns = [c.replace('_', ' ').title() for c in df.columns]
+                    st.dataframe(df, use_container_width=True)
         
         elif page == "Patients":
             st.title("Manage Patients")
@@ -827,13 +3904,14 @@ def main():
                         st.error(message)
             
             st.subheader("Patients List")
-            patients = get_patients()
-            if patients:
-                df = pd.DataFrame(patients)
-                df = df[['patient_id', 'name', 'age', 'gender', 'contact', 'admission_date']]
-                df.columns = ['ID', 'Name', 'Age', 'Gender', 'Contact', 'Admission Date']
-                st.dataframe(df, use_container_width=True)
-                
+            patients = render_paginated_list(
+                "patients_page", get_patients_page,
+                ['patient_id', 'name', 'age', 'gender', 'contact', 'admission_date'],
+                ['ID', 'Name', 'Age', 'Gender', 'Contact', 'Admission Date'],
+                ['patient_id', 'name', 'age'],
+                {'gender': ["Male", "Female", "Other"]}
+            )
+            if patients.rows:
                 st.subheader("Delete Patient")
                 patient_id = st.number_input("Enter Patient ID to delete", min_value=1, step=1, key="delete_patient")
                 if st.button("Delete Patient"):
@@ -843,6 +3921,14 @@ def main():
                         st.rerun()
                     else:
                         st.error(message)
+                
+                st.subheader("Bulk Delete")
+                selected = st.multiselect("Patients on this page", [row['patient_id'] for row in patients.rows],
+                                          format_func=lambda pid: f"{pid} - {next(r['name'] for r in patients.rows if r['patient_id'] == pid)}",
+                                          key="bulk_patients")
+                if st.button("Delete Selected Patients", disabled=not selected):
+                    run_batch_action("bulk_patients_report", "Deleted {count} patients", delete_patients, selected)
+                render_batch_report("bulk_patients_report")
             else:
                 st.write("No patients found")
         
@@ -868,13 +3954,14 @@ def main():
                         st.error(message)
             
             st.subheader("Doctors List")
-            doctors = get_doctors()
-            if doctors:
-                df = pd.DataFrame(doctors)
-                df = df[['doctor_id', 'name', 'specialty', 'contact']]
-                df.columns = ['ID', 'Name', 'Specialty', 'Contact']
-                st.dataframe(df, use_container_width=True)
-                
+            doctors = render_paginated_list(
+                "doctors_page", get_doctors_page,
+                ['doctor_id', 'name', 'specialty', 'contact'],
+                ['ID', 'Name', 'Specialty', 'Contact'],
+                ['doctor_id', 'name', 'specialty'],
+                {'specialty': None}
+            )
+            if doctors.rows:
                 st.subheader("Delete Doctor")
                 doctor_id = st.number_input("Enter Doctor ID to delete", min_value=1, step=1, key="delete_doctor")
                 if st.button("Delete Doctor"):
@@ -896,7 +3983,7 @@ def main():
                 with col1:
                     ward = st.text_input("Ward", placeholder="Enter ward name")
                 with col2:
-                    status = st.selectbox("Status", ["available", "occupied", "maintenance"], key="bed_status")
+                    status = st.selectbox("Status", NEW_BED_STATUSES, key="bed_status")
                 submit = st.form_submit_button("Add Bed")
                 
                 if submit:
@@ -908,13 +3995,14 @@ def main():
                         st.error(message)
             
             st.subheader("Beds List")
-            beds = get_beds()
-            if beds:
-                df = pd.DataFrame(beds)
-                df = df[['bed_id', 'ward', 'status', 'last_cleaned']]
-                df.columns = ['ID', 'Ward', 'Status', 'Last Cleaned']
-                st.dataframe(df, use_container_width=True)
-                
+            beds = render_paginated_list(
+                "beds_page", get_beds_page,
+                ['bed_id', 'ward', 'status', 'last_cleaned'],
+                ['ID', 'Ward', 'Status', 'Last Cleaned'],
+                ['bed_id', 'ward', 'status'],
+                {'ward': None, 'status': BED_STATUSES}
+            )
+            if beds.rows:
                 st.subheader("Delete Bed")
                 bed_id = st.number_input("Enter Bed ID to delete", min_value=1, step=1, key="delete_bed")
                 if st.button("Delete Bed"):
@@ -924,37 +4012,230 @@ def main():
                         st.rerun()
                     else:
                         st.error(message)
+                
+                st.subheader("Bulk Actions")
+                selected = st.multiselect("Beds on this page", [row['bed_id'] for row in beds.rows],
+                                          format_func=lambda bid: f"{bid} - {next(r['ward'] for r in beds.rows if r['bed_id'] == bid)}",
+                                          key="bulk_beds")
+                col1, col2, col3 = st.columns(3)
+                if col1.button("Mark Available", disabled=not selected):
+                    run_batch_action("bulk_beds_report", "Marked {count} beds available", set_beds_status,
+                                     'available', bed_ids=selected)
+                if col2.button("Mark Maintenance", disabled=not selected):
+                    run_batch_action("bulk_beds_report", "Marked {count} beds for maintenance", set_beds_status,
+                                     'maintenance', bed_ids=selected)
+                if col3.button("Delete Selected Beds", disabled=not selected):
+                    run_batch_action("bulk_beds_report", "Deleted {count} beds", delete_beds, selected)
+                
+                col1, col2, col3 = st.columns([2, 2, 1])
+                ward = col1.text_input("Whole ward", placeholder="Ward name", key="bulk_ward").strip()
+                ward_status = col2.selectbox("Set status to", BATCH_BED_STATUSES, index=1, key="bulk_ward_status")
+                if col3.button("Apply to Ward", disabled=not ward):
+                    run_batch_action("bulk_beds_report", f"Set {{count}} beds in {ward} to {ward_status}",
+                                     set_beds_status, ward_status, ward=ward)
+                render_batch_report("bulk_beds_report")
             else:
                 st.write("No beds found")
         
+        elif page == "Bed Board":
+            st.title("Live Bed Board")
+            if hasattr(st, 'fragment'):
+                # Re-run only the board on a timer, polling the change feed
+                st.fragment(run_every=BED_BOARD_POLL_SECONDS)(render_bed_board)()
+            else:
+                render_bed_board()
+                if st.button("Refresh"):
+                    st.rerun()
+        
+        elif page == "Diagnostics" and st.session_state.user.get('is_admin'):
+            st.title("Diagnostics")
+            metrics = get_metrics()
+            st.caption(f"Statements slower than {metrics.slow_query_seconds * 1000:.0f} ms are logged to "
+                       f"{INSTRUMENTATION_CONFIG['slow_query_log'] or 'memory only'}")
+            
+            st.subheader("Query Latency")
+            queries = metrics.summary('query')
+            if queries:
+                st.dataframe(pd.DataFrame(queries).sort_values('p95_ms', ascending=False),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.write("No queries recorded yet")
+            
+            st.subheader("Page Render Time")
+            pages_timed = metrics.summary('page')
+            if pages_timed:
+                st.dataframe(pd.DataFrame(pages_timed), use_container_width=True, hide_index=True)
+            
+            st.subheader(f"Slow Queries ({metrics.slow_query_count} total)")
+            slow = metrics.slow_queries()
+            if slow:
+                st.dataframe(pd.DataFrame(slow), use_container_width=True, hide_index=True)
+            else:
+                st.write("No slow queries recorded")
+            
+            st.subheader("Connection Pool")
+            st.json(get_connection_pool().stats())
+            
+            prometheus_text = metrics.render_prometheus()
+            with st.expander("Prometheus metrics"):
+                st.code(prometheus_text, language="text")
+            st.download_button("Download metrics", prometheus_text, file_name="metrics.prom", mime="text/plain")
+        
+        elif page == "History":
+            st.title("Discharge History")
+            counts = get_archive_stats()
+            if counts:
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Current Patients", counts.get('patients', 0))
+                col2.metric("Current Assignments", counts.get('assignments', 0))
+                col3.metric("Archived Patients", counts.get('patient_history', 0))
+                col4.metric("Archived Stays", counts.get('assignment_history', 0))
+                st.caption("Approximate row counts. Patients are archived "
+                           f"{ARCHIVE_CONFIG['retention_days']} days after discharge.")
+            
+            st.subheader("Archived Stays")
+            col1, col2, col3, col4 = st.columns(4)
+            start = col1.date_input("From", datetime.now().date() - timedelta(days=30), key="history_start")
+            end = col2.date_input("To", datetime.now().date(), key="history_end")
+            ward = col3.text_input("Ward", placeholder="All", key="history_ward").strip()
+            name = col4.text_input("Patient Name", placeholder="All", key="history_name").strip()
+            try:
+                df = search_history(datetime.combine(start, datetime.min.time()),
+                                    datetime.combine(end + timedelta(days=1), datetime.min.time()),
+                                    ward or None, name or None)
+            except mysql.connector.Error as err:
+                st.error(f"Could not load history: {err}")
+                df = pd.DataFrame()
+            if df.empty:
+                st.write("No archived stays match")
+            else:
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                st.caption(f"Showing up to {SEARCH_RESULT_LIMIT} most recent discharges")
+            
+            st.subheader("Patient Record")
+            patient_id = st.number_input("Patient ID", min_value=1, step=1, key="history_patient")
+            if st.button("Look Up"):
+                history = get_patient_history(patient_id)
+                if history['patient'].empty and history['stays'].empty:
+                    st.write("No record of this patient")
+                else:
+                    st.dataframe(history['patient'], use_container_width=True, hide_index=True)
+                    st.dataframe(history['stays'], use_container_width=True, hide_index=True)
+            
+            if st.session_state.user.get('is_admin') and st.button("Archive Now"):
+                with st.spinner("Archiving..."):
+                    archived = archive_discharged()
+                st.success(f"Archived {archived} discharged patients")
+        
+        elif page == "Analytics":
+            st.title("Occupancy Analytics")
+            days = st.selectbox("Period", [1, 7, 30, 90, 365], index=2, format_func=lambda d: f"Last {d} days",
+                                key="analytics_days")
+            try:
+                analytics = get_occupancy_analytics(days)
+            except mysql.connector.Error as err:
+                st.error(f"Could not load analytics: {err}")
+                analytics = None
+            if analytics is None:
+                st.info("No admissions or discharges recorded yet")
+            else:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Admissions", analytics['admissions'])
+                col2.metric("Discharges", analytics['discharges'])
+                col3.metric("Peak Hour", f"{analytics['peak_hour']:02d}:00")
+                
+                occupancy = analytics['occupancy']
+                wards = st.multiselect("Wards", list(occupancy.columns), key="analytics_wards")
+                st.subheader("Occupied Beds")
+                st.line_chart(occupancy[wards] if wards else occupancy)
+                
+                st.subheader("By Hour of Day")
+                col1, col2 = st.columns(2)
+                col1.caption("Mean occupied beds")
+                col1.bar_chart(analytics['by_hour']['mean_occupied'])
+                col2.caption("Admissions")
+                col2.bar_chart(analytics['by_hour']['admissions'])
+                
+                st.subheader("Average Length of Stay")
+                if analytics['length_of_stay'].empty:
+                    st.write("No discharges in this period")
+                else:
+                    st.dataframe(analytics['length_of_stay'], use_container_width=True)
+                st.caption(f"Computed from hourly rollups at {analytics['generated_at']:%H:%M:%S}")
+        
+        elif page == "Housekeeping":
+            st.title("Housekeeping")
+            queue = get_housekeeping_queue()
+            st.subheader(f"Beds Waiting for Cleaning ({len(queue)})")
+            if queue:
+                df = pd.DataFrame(queue)[['bed_id', 'ward', 'dirty_since', 'waited_hours', 'free_in_ward', 'priority']]
+                df.columns = ['Bed ID', 'Ward', 'Dirty Since', 'Hours Waiting', 'Free Beds in Ward', 'Priority']
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                
+                options = {f"Bed {bed['bed_id']} - {bed['ward']}": bed['bed_id'] for bed in queue}
+                col1, col2 = st.columns([3, 1])
+                # The queue is ordered, so the default choice is the most urgent bed
+                choice = col1.selectbox("Bed", list(options), key="housekeeping_bed")
+                if col2.button("Mark Clean"):
+                    success, message = complete_cleaning(options[choice])
+                    if success:
+                        st.success(message)
+                        st.rerun()
+                    else:
+                        st.error(message)
+            else:
+                st.write("Every bed is clean")
+            
+            st.subheader(f"Turnover by Ward (last {HOUSEKEEPING_CONFIG['metrics_days']} days)")
+            try:
+                turnover = get_turnover_metrics()
+            except mysql.connector.Error as err:
+                st.error(f"Could not load turnover metrics: {err}")
+                turnover = pd.DataFrame()
+            if turnover.empty:
+                st.write("No turnovers recorded yet")
+            else:
+                st.dataframe(turnover, use_container_width=True)
+                st.bar_chart(turnover['mean_hours'].dropna())
+                st.caption("Hours from discharge until the bed is available again; slowest wards first")
+        
         elif page == "Assignments":
             st.title("Manage Assignments")
             
+            st.subheader("Create New Assignment")
+            # Search boxes sit outside the form so that typing re-runs the
+            # limited lookups; only the top matches reach the selectors
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                patient_term = st.text_input("Find Patient", placeholder="Name or ID", key="assign_patient_search")
+            with col2:
+                doctor_term = st.text_input("Find Doctor", placeholder="Name, specialty or ID", key="assign_doctor_search")
+            with col3:
+                bed_term = st.text_input("Find Bed", placeholder="Ward or bed ID", key="assign_bed_search")
+            
+            patients = find_patient_options(patient_term)
+            doctors = find_doctor_options(doctor_term)
+            beds = find_bed_options(bed_term)
+            patient_options = {f"{name} (ID: {pid})": pid for pid, name in patients}
+            doctor_options = {f"{name} (ID: {did})": did for did, name in doctors}
+            bed_options = {f"{ward} (ID: {bid})": bid for bid, ward in beds}
+            
             with st.form("add_assignment_form"):
-                st.subheader("Create New Assignment")
-                patients = get_patients()
-                beds = get_available_beds()
-                doctors = get_doctors()
-                
-                patient_options = {f"{p['name']} (ID: {p['patient_id']})": p['patient_id'] for p in patients}
-                bed_options = {f"{b['ward']} (ID: {b['bed_id']})": b['bed_id'] for b in beds}
-                doctor_options = {f"{d['name']} (ID: {d['doctor_id']})": d['doctor_id'] for d in doctors}
-                
                 col1, col2 = st.columns(2)
                 with col1:
-                    patient = st.selectbox("Patient", list(patient_options.keys()) if patient_options else ["No patients available"], 
+                    patient = st.selectbox("Patient", list(patient_options.keys()) if patient_options else ["No matching patients"], 
                                           key="assign_patient")
-                    doctor = st.selectbox("Doctor", list(doctor_options.keys()) if doctor_options else ["No doctors available"], 
+                    doctor = st.selectbox("Doctor", list(doctor_options.keys()) if doctor_options else ["No matching doctors"], 
                                          key="assign_doctor")
                 with col2:
-                    bed = st.selectbox("Bed", list(bed_options.keys()) if bed_options else ["No available beds"], 
+                    bed = st.selectbox("Bed", list(bed_options.keys()) if bed_options else ["No matching available beds"], 
                                       key="assign_bed")
                 
                 submit = st.form_submit_button("Create Assignment")
                 
                 if submit:
                     if not patient_options or not bed_options or not doctor_options:
-                        st.error("Cannot create assignment: Missing patients, beds, or doctors")
+                        st.error("Cannot create assignment: Find and select a patient, bed, and doctor")
                     else:
                         success, message = create_assignment(
                             patient_options[patient],
@@ -967,14 +4248,41 @@ def main():
                         else:
                             st.error(message)
             
-            st.subheader("Assignments List")
-            assignments = get_assignments()
-            if assignments:
-                df = pd.DataFrame(assignments)
-                df = df[['assignment_id', 'patient_name', 'bed_id', 'ward', 'doctor_name', 'assignment_date']]
-                df.columns = ['ID', 'Patient', 'Bed ID', 'Ward', 'Doctor', 'Assignment Date']
-                st.dataframe(df, use_container_width=True)
+            st.subheader("Batch Allocation")
+            with st.form("batch_allocation_form"):
+                batch_csv = st.text_area("Pending Admissions (CSV)", height=150, key="batch_admissions",
+                                         placeholder="patient_id,wards,specialty,priority\n12,ICU;General,Cardiology,1")
+                fallback = st.checkbox("Use any ward when the preferred wards are full", key="batch_fallback")
+                allocate = st.form_submit_button("Allocate Beds")
                 
+                if allocate:
+                    admissions, errors = parse_admissions(csv.DictReader(io.StringIO(batch_csv.strip())))
+                    if errors:
+                        st.error("Fix these rows before allocating")
+                        st.dataframe(pd.DataFrame(errors), use_container_width=True)
+                    elif not admissions:
+                        st.error("Enter at least one admission")
+                    else:
+                        report = allocate_beds(admissions, fallback)
+                        if report['error']:
+                            st.error(report['error'])
+                        else:
+                            st.success(f"Assigned {len(report['assigned'])} of {len(admissions)} patients")
+                            if report['assigned']:
+                                st.dataframe(pd.DataFrame(report['assigned']), use_container_width=True)
+                            if report['unplaced']:
+                                st.warning(f"{len(report['unplaced'])} patients could not be placed")
+                                st.dataframe(pd.DataFrame(report['unplaced']), use_container_width=True)
+            
+            st.subheader("Assignments List")
+            assignments = render_paginated_list(
+                "assignments_page", get_assignments_page,
+                ['assignment_id', 'patient_name', 'bed_id', 'ward', 'doctor_name', 'assignment_date'],
+                ['ID', 'Patient', 'Bed ID', 'Ward', 'Doctor', 'Assignment Date'],
+                ['assignment_id', 'ward'],
+                {'ward': None}
+            )
+            if assignments.rows:
                 st.subheader("Delete Assignment")
                 assignment_id = st.number_input("Enter Assignment ID to delete", min_value=1, step=1, key="delete_assignment")
                 if st.button("Delete Assignment"):
@@ -984,6 +4292,28 @@ def main():
                         st.rerun()
                     else:
                         st.error(message)
+                
+                st.subheader("Bulk Discharge")
+                selected = st.multiselect("Assignments on this page", [row['assignment_id'] for row in assignments.rows],
+                                          format_func=lambda aid: f"{aid} - {next(r['patient_name'] for r in assignments.rows if r['assignment_id'] == aid)}",
+                                          key="bulk_assignments")
+                if st.button("Discharge Selected", disabled=not selected):
+                    run_batch_action("bulk_assignments_report", "Discharged {count} assignments",
+                                     discharge_assignments, selected)
+                
+                # Selections beyond the current page: by patient id or whole ward
+                col1, col2 = st.columns([4, 1])
+                patient_text = col1.text_input("Patient IDs", placeholder="e.g. 12, 40, 41", key="bulk_patient_ids")
+                patient_ids = [int(p) for p in re.split(r'[\s,]+', patient_text.strip()) if p.isdigit()]
+                if col2.button("Discharge Patients", disabled=not patient_ids):
+                    run_batch_action("bulk_assignments_report", "Discharged {count} assignments",
+                                     discharge_assignments, patient_ids=patient_ids)
+                col1, col2 = st.columns([4, 1])
+                ward = col1.text_input("Whole ward", placeholder="Ward name", key="bulk_discharge_ward").strip()
+                if col2.button("Discharge Ward", disabled=not ward):
+                    run_batch_action("bulk_assignments_report", f"Discharged {{count}} assignments in {ward}",
+                                     discharge_assignments, ward=ward)
+                render_batch_report("bulk_assignments_report")
             else:
                 st.write("No assignments found")
         
@@ -1004,10 +4334,95 @@ def main():
                     if not df.empty:
                         st.subheader(f"Search Results for '{search_term}' in {search_type}")
                         st.dataframe(df, use_container_width=True)
+                        if len(df) >= SEARCH_RESULT_LIMIT:
+                            st.caption(f"Showing the top {SEARCH_RESULT_LIMIT} matches; refine the search term to narrow results")
                     else:
                         st.warning(f"No {search_type.lower()}s found matching '{search_term}'")
                 elif submit:
                     st.error("Please enter a search term")
 
+        
+        elif page == "Import":
+            st.title("Bulk Import")
+            st.write("Upload a CSV or Parquet file. Columns: patients - name, age, gender, contact; "
+                     "doctors - name, specialty, contact; beds - ward, status.")
+            
+            with st.form("import_form"):
+                table = st.selectbox("Import Into", list(IMPORT_SPECS), key="import_table")
+                upload = st.file_uploader("Data File", type=["csv", "parquet"], key="import_file")
+                submit = st.form_submit_button("Import")
+                
+                if submit and upload:
+                    try:
+                        with st.spinner("Importing..."):
+                            report = bulk_import(table, iter_import_records(upload, upload.name))
+                    except (ImportError, csv.Error, UnicodeDecodeError) as err:
+                        st.error(f"Could not read file: {err}")
+                    else:
+                        st.success(f"Imported {report['imported']} {table}")
+                        if report['failed']:
+                            st.warning(f"{report['failed']} rows were rejected")
+                            df = pd.DataFrame(report['errors'])
+                            df.columns = ['Row', 'Error']
+                            st.dataframe(df, use_container_width=True)
+                elif submit:
+                    st.error("Please choose a file to import")
+        
+        elif page == "Export":
+            st.title("Export Data")
+            st.write(f"Exports are streamed to a file on the server and offered for download up to "
+                     f"{EXPORT_DOWNLOAD_MAX_BYTES // 2 ** 20} MB; larger extracts must be run with export_data.py.")
+            
+            col1, col2, col3 = st.columns(3)
+            table = col1.selectbox("Data", list(EXPORT_SPECS), key="export_table")
+            fmt = col2.selectbox("Format", EXPORT_FORMATS, format_func=str.upper, key="export_format")
+            compression = col3.selectbox("Compression", EXPORT_COMPRESSIONS, format_func=lambda c: c or "none",
+                                         key="export_compression")
+            if st.button("Prepare Export"):
+                discard_export()
+                name = export_filename(table, fmt, compression)
+                file = tempfile.NamedTemporaryFile(suffix=f"_{name}", delete=False)
+                try:
+                    with st.spinner("Exporting..."), file:
+                        rows = export_table(table, file, fmt, compression)
+                    st.session_state.export = {'table': table, 'name': name, 'path': file.name, 'rows': rows,
+                                               'size': os.path.getsize(file.name)}
+                except (ImportError, mysql.connector.Error) as err:
+                    os.remove(file.name)
+                    st.error(f"Export failed: {err}")
+            
+            export = st.session_state.get('export')
+            if export and export['size'] > EXPORT_DOWNLOAD_MAX_BYTES:
+                discard_export()
+                st.error(f"{export['name']} is {export['size'] / 2 ** 20:.0f} MB, too large to download here; "
+                         f"run: python export_data.py {export['table']} {export['name']}")
+            elif export:
+                st.success(f"{export['rows']} rows ready in {export['name']} ({export['size'] / 2 ** 20:.1f} MB)")
+                with open(export['path'], 'rb') as file:
+                    st.download_button("Download", file, file_name=export['name'],
+                                       mime="application/octet-stream", on_click=discard_export)
+
+# Delete the session's prepared export file, if any
+def discard_export():
+    export = st.session_state.pop('export', None)
+    if export:
+        try:
+            os.remove(export['path'])
+        except OSError:
+            pass
+
+# Render the app, timing each script run under the page it showed
+def run_app():
+    metrics = get_metrics()
+    started = time.perf_counter()
+    try:
+        main()
+    finally:
+        if st.session_state.get('user'):
+            page = st.session_state.get('nav_page', "Dashboard")
+        else:
+            page = st.session_state.get('page', 'login').title()
+        metrics.observe('page', page, time.perf_counter() - started)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_app()
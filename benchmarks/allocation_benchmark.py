@@ -0,0 +1,101 @@
+# Benchmark the batch bed allocator.
+#
+#   python benchmarks/allocation_benchmark.py --admissions 1000 --beds 10000
+#
+# Loads a synthetic hospital with every non-maintenance bed free, builds a
+# deterministic wave of admissions with ward preferences and specialty needs,
+# then times app.plan_allocation() on its own and app.allocate_beds() end to
+# end (locking, matching and the single commit). The allocations are undone
+# between runs. Results are printed as JSON.
+import argparse
+import json
+import random
+import time
+
+from common import app, summarise, time_call, use_database
+from synthetic import SPECIALTIES, generate_hospital, ward_names
+
+# Admissions with 0-3 preferred wards, a specialty for most and a few urgent ones
+def build_admissions(count, wards, seed):
+    rng = random.Random(seed)
+    names = ward_names(wards)
+    return [
+        app.Admission(patient_id,
+                      tuple(rng.sample(names, rng.randint(0, 3))),
+                      rng.choice(SPECIALTIES) if rng.random() < 0.7 else None,
+                      2 if rng.random() < 0.05 else 0)
+        for patient_id in range(1, count + 1)
+    ]
+
+# Available beds and doctor caseloads, as allocate_beds() reads them
+def load_inputs():
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT bed_id, ward FROM beds WHERE status = "available" ORDER BY bed_id')
+    beds = cursor.fetchall()
+    cursor.execute('''
+        SELECT d.doctor_id, d.specialty, COUNT(a.assignment_id)
+        FROM doctors d
+        LEFT JOIN assignments a ON a.doctor_id = d.doctor_id
+        GROUP BY d.doctor_id, d.specialty
+    ''')
+    doctors = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return beds, doctors
+
+# Free every bed the previous run allocated
+def reset():
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM assignments')
+    cursor.execute('UPDATE beds SET status = "available" WHERE status = "occupied"')
+    conn.commit()
+    cursor.close()
+    conn.close()
+    app._bed_index().reconcile()
+    app.invalidate_cache()
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the batch bed allocator")
+    parser.add_argument('--database', default='hospital_bench', help="scratch database to use")
+    parser.add_argument('--admissions', type=int, default=1000)
+    parser.add_argument('--beds', type=int, default=10000)
+    parser.add_argument('--wards', type=int, default=20)
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs per case")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    use_database(args.database)
+    conn = app.get_db_connection()
+    generate_hospital(conn, args.wards, args.beds, args.doctors, patients=args.admissions, assignments=0,
+                      seed=args.seed)
+    conn.close()
+    app._bed_index().reconcile()  # loaded outside the change feed
+
+    admissions = build_admissions(args.admissions, args.wards, args.seed)
+    beds, doctors = load_inputs()
+    plan, (placements, unplaced) = time_call(lambda: app.plan_allocation(admissions, beds, doctors), args.repeats)
+
+    timings = []
+    report = None
+    for _ in range(args.repeats):
+        reset()
+        started = time.perf_counter()
+        report = app.allocate_beds(admissions)
+        timings.append((time.perf_counter() - started) * 1000)
+        if report['error']:
+            raise RuntimeError(report['error'])
+
+    print(json.dumps({
+        'admissions': args.admissions,
+        'available_beds': len(beds),
+        'wards': args.wards,
+        'doctors': args.doctors,
+        'plan_allocation': dict(plan, placed=len(placements), unplaced=len(unplaced)),
+        'allocate_beds': dict(summarise(timings), placed=len(report['assigned']), unplaced=len(report['unplaced']))
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Concurrency stress test for bed allocation.
+#
+#   python benchmarks/allocation_stress.py --threads 32 --beds 200
+#
+# Resets the beds and assignments tables of a scratch database, then has many
+# threads race admit_patient() for a small pool of beds. Reports
+# throughput and verifies that no bed was assigned twice; exits non-zero if
+# any double booking is found.
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from common import app, use_database
+
+# Fresh beds, plus enough patients and one doctor to satisfy the foreign keys
+def prepare(beds, patients):
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM assignments')
+    cursor.execute('DELETE FROM beds')
+    cursor.executemany('INSERT INTO beds (ward, status, last_cleaned) VALUES (%s, "available", NOW())',
+                       [(f"Ward {i % 10}",) for i in range(beds)])
+    cursor.execute('SELECT COUNT(*) FROM patients')
+    missing = patients - cursor.fetchone()[0]
+    if missing > 0:
+        cursor.executemany('INSERT INTO patients (name, age, gender, admission_date) VALUES (%s, 40, "Other", NOW())',
+                           [(f"Stress Patient {i}",) for i in range(missing)])
+    cursor.execute('INSERT INTO doctors (name, specialty) VALUES ("Stress Doctor", "General")')
+    doctor_id = cursor.lastrowid
+    conn.commit()
+
+    cursor.execute('SELECT bed_id FROM beds')
+    bed_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT patient_id FROM patients LIMIT %s', (patients,))
+    patient_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    app._bed_index().reconcile()  # loaded outside the change feed
+    return bed_ids, patient_ids, doctor_id
+
+# Count beds holding more than one assignment, and occupied beds holding none
+def verify():
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM (SELECT bed_id FROM assignments GROUP BY bed_id HAVING COUNT(*) > 1) t')
+    double_booked = cursor.fetchone()[0]
+    cursor.execute('''
+        SELECT COUNT(*) FROM beds b
+        LEFT JOIN assignments a ON a.bed_id = b.bed_id
+        WHERE b.status = "occupied" AND a.assignment_id IS NULL
+    ''')
+    orphaned = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return double_booked, orphaned
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer admit_patient from many threads")
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--beds', type=int, default=200)
+    parser.add_argument('--attempts', type=int, default=100, help="allocation attempts per thread")
+    parser.add_argument('--database', default='hospital_bench')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    use_database(args.database, pool_size=args.threads)
+    bed_ids, patient_ids, doctor_id = prepare(args.beds, args.threads * args.attempts)
+
+    outcomes = {'allocated': 0, 'conflicts': 0, 'errors': 0}
+    lock = threading.Lock()
+    start_gate = threading.Barrier(args.threads)
+
+    def worker(worker_id):
+        rng = random.Random(args.seed + worker_id)
+        patients = patient_ids[worker_id::args.threads]
+        start_gate.wait()
+        for attempt in range(args.attempts):
+            result = app.admit_patient(patients[attempt % len(patients)], rng.choice(bed_ids), doctor_id)
+            key = 'allocated' if not result['error'] else 'conflicts' if result['error_kind'] == 'conflict' else 'errors'
+            with lock:
+                outcomes[key] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    double_booked, orphaned = verify()
+    attempts = args.threads * args.attempts
+    print(json.dumps(dict(
+        outcomes,
+        threads=args.threads,
+        beds=args.beds,
+        attempts=attempts,
+        seconds=round(elapsed, 3),
+        attempts_per_second=round(attempts / elapsed, 1),
+        double_booked_beds=double_booked,
+        occupied_beds_without_assignment=orphaned
+    ), indent=2))
+    if double_booked or orphaned or outcomes['allocated'] > args.beds:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
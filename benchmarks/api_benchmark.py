@@ -0,0 +1,80 @@
+# Latency and throughput of a running JSON API server (api.py).
+#
+#   export HOSPITAL_API_TOKEN=secret
+#   python api.py --port 8080 &
+#   python benchmarks/api_benchmark.py --url http://127.0.0.1:8080 --clients 16
+#
+# Each client thread keeps one HTTP/1.1 connection open and issues the read
+# endpoints machine clients poll (available beds, dashboard counts, search)
+# in turn. Reports per-endpoint latency and overall requests per second, as
+# JSON. Only reads are issued, so the data set is left unchanged.
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from common import summarise
+
+ENDPOINTS = [
+    '/beds/available',
+    '/dashboard',
+    '/search?type=Patient&q=smith',
+    '/search?type=Bed&q=available'
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a running api.py server with read requests")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--clients', type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument('--requests', type=int, default=200, help="requests per client")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    headers = {'Authorization': f"Bearer {os.environ.get('HOSPITAL_API_TOKEN', '')}"}
+    timings = {path: [] for path in ENDPOINTS}
+    failures = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(args.clients)
+
+    def client(client_id):
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        local = {path: [] for path in ENDPOINTS}
+        start_gate.wait()
+        for i in range(args.requests):
+            path = ENDPOINTS[(client_id + i) % len(ENDPOINTS)]
+            started = time.perf_counter()
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            local[path].append((time.perf_counter() - started) * 1000)
+            if response.status != 200:
+                with lock:
+                    failures.append({'path': path, 'status': response.status})
+        conn.close()
+        with lock:
+            for path, values in local.items():
+                timings[path].extend(values)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = args.clients * args.requests
+    print(json.dumps({
+        'clients': args.clients,
+        'requests': total,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(total / elapsed, 1),
+        'failures': len(failures),
+        'endpoints': {path: summarise(values) for path, values in timings.items() if values}
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Query-plan regression check for the hot queries in app.py.
+#
+#   python benchmarks/check_query_plans.py                # load synthetic data first
+#   python benchmarks/check_query_plans.py --skip-load
+#
+# Exercises the hot data-access paths against a populated scratch database,
+# captures every statement they run through app.QUERY_OBSERVERS, EXPLAINs it
+# and exits non-zero if any plan falls back to a full table scan (type ALL)
+# over a table large enough to matter. The unpaginated get_*() helpers and the
+# bed index reconcile read whole tables by design and are not exercised.
+import argparse
+import json
+import re
+import sys
+
+from common import app, use_database
+from synthetic import generate_hospital
+
+# Full scans of tables estimated below this many rows are ignored: the
+# optimiser rightly prefers them for tiny tables
+MIN_SCAN_ROWS = 1000
+
+# Hot paths to check: name -> callable
+def hot_paths():
+    paths = {}
+    for table, spec in app.PAGINATION.items():
+        for sort in spec['sort']:
+            paths[f'{table}_page_sort_{sort}'] = (lambda t=table, s=sort: app.fetch_page(t, sort=s))
+            paths[f'{table}_page_sort_{sort}_next'] = (lambda t=table, s=sort: next_page(t, s))
+        for name in spec['filters']:
+            value = sample_value(table, name)
+            paths[f'{table}_page_filter_{name}'] = (lambda t=table, n=name, v=value: app.fetch_page(t, filters={n: v}))
+    paths.update({
+        'search_patient': lambda: app.search_data("Patient", "smith"),
+        'search_patient_prefix': lambda: app.search_data("Patient", "jo"),
+        'search_doctor': lambda: app.search_data("Doctor", "cardio"),
+        'search_doctor_prefix': lambda: app.search_data("Doctor", "ca"),
+        'search_bed': lambda: app.search_data("Bed", "icu"),
+        'search_bed_status': lambda: app.search_data("Bed", "available"),
+        'dashboard_metrics': app.get_dashboard_metrics.uncached,
+        'get_security_question': lambda: app.get_security_question("nobody@example.com"),
+        'login': lambda: app.login("nobody@example.com", "password", app.CONSTANT_PASSKEY),
+        # A bed id that cannot exist, so the check never changes the data
+        'create_assignment': lambda: app.create_assignment(1, -1, 1),
+        'delete_assignment': lambda: app.delete_assignment(0),
+        'housekeeping_queue': app.get_housekeeping_queue,
+        'complete_cleaning': lambda: app.complete_cleaning(-1),
+        'read_bed_feed': lambda: app.read_bed_feed(0)
+    })
+    return paths
+
+# Move one page forward so the keyset seek predicate is part of the plan
+def next_page(table, sort):
+    page = app.fetch_page(table, sort=sort)
+    return app.fetch_page(table, after=page.last, sort=sort) if page.last else page
+
+# A real value for a filter column, so the optimiser sees a realistic predicate
+def sample_value(table, column):
+    expression = app.PAGINATION[table]['filters'][column]
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    from_clause = re.split(r'\sFROM\s', app.PAGINATION[table]['select'], maxsplit=1, flags=re.I)[1]
+    cursor.execute(f'SELECT {expression} FROM {from_clause} LIMIT 1')
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return row[0] if row else None
+
+# Run every hot path and collect the statements it executes
+def capture_statements():
+    captured = []
+    current = {'path': None}
+
+    def observer(statement, params, seconds, name):
+        if statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE'):
+            captured.append((current['path'], statement, params))
+
+    app.QUERY_OBSERVERS.append(observer)
+    try:
+        for name, func in hot_paths().items():
+            current['path'] = name
+            func()
+    finally:
+        app.QUERY_OBSERVERS.remove(observer)
+    return captured
+
+# EXPLAIN each captured statement and report full scans of large tables
+def check_plans(captured):
+    conn = app.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    report, violations = [], []
+    try:
+        for path, statement, params in captured:
+            cursor.execute('EXPLAIN ' + statement, params)
+            plan = cursor.fetchall()
+            scans = [row['table'] for row in plan
+                     if row['type'] == 'ALL' and (row['rows'] or 0) >= MIN_SCAN_ROWS]
+            entry = {
+                'path': path,
+                'statement': ' '.join(statement.split()),
+                'plan': [{k: row[k] for k in ('table', 'type', 'key', 'rows', 'Extra')} for row in plan],
+                'full_scans': scans
+            }
+            report.append(entry)
+            if scans:
+                violations.append(entry)
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+    return report, violations
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query in app.py falls back to a full table scan")
+    parser.add_argument('--database', default='hospital_bench', help="scratch database to use")
+    parser.add_argument('--patients', type=int, default=50000)
+    parser.add_argument('--skip-load', action='store_true', help="reuse the data already in the database")
+    parser.add_argument('--verbose', action='store_true', help="print every plan, not only violations")
+    args = parser.parse_args()
+
+    use_database(args.database)
+    if not args.skip_load:
+        conn = app.get_db_connection()
+        generate_hospital(conn, patients=args.patients, assignments=args.patients // 2)
+        conn.close()
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    for table in ('patients', 'doctors', 'beds', 'assignments'):
+        cursor.execute(f'ANALYZE TABLE {table}')
+        cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    report, violations = check_plans(capture_statements())
+    print(json.dumps({
+        'statements_checked': len(report),
+        'violations': violations,
+        'plans': report if args.verbose else None
+    }, indent=2, default=str))
+    if violations:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
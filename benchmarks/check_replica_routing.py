@@ -0,0 +1,78 @@
+# Check read/write splitting against a real primary and replica(s).
+#
+#   python benchmarks/check_replica_routing.py --replica 127.0.0.1:3307
+#
+# The primary comes from app.DB_CONFIG; each --replica must replicate it (two
+# local mysqld instances with GTID replication are enough). The check applies
+# the migrations to a scratch database, then verifies that writes use the
+# primary, that reads go to a replica while it is in sync, that a read right
+# after a write sees the write (with GTIDs off, also that it is pinned to the
+# primary), and that reads return to the replica once it has caught up. With
+# GTIDs on, a replica that has applied the write may serve that read. Exits
+# non-zero on any failure.
+import argparse
+import json
+import sys
+import time
+
+from common import app, use_database
+
+# server_id of the server a connection from get_db_connection() talks to
+def served_by(read_only):
+    conn = app.get_db_connection(read_only=read_only)
+    cursor = conn.cursor()
+    cursor.execute('SELECT @@server_id')
+    server_id = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return server_id
+
+def patient_visible(name):
+    conn = app.get_db_connection(read_only=True)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM patients WHERE name = %s', (name,))
+    visible = cursor.fetchone()[0] > 0
+    cursor.close()
+    conn.close()
+    return visible
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify replica routing and read-your-writes")
+    parser.add_argument('--replica', action='append', required=True, metavar='HOST:PORT')
+    parser.add_argument('--database', default='hospital_bench', help="scratch database to use")
+    parser.add_argument('--timeout', type=float, default=30, help="seconds to wait for replicas to catch up")
+    args = parser.parse_args()
+
+    use_database(args.database)
+    for replica in args.replica:
+        host, _, port = replica.partition(':')
+        app.DB_REPLICAS.append({'host': host, 'port': int(port or 3306)})
+    app.get_replica_set.clear()
+
+    checks = {}
+    primary = served_by(read_only=False)
+    time.sleep(app.REPLICA_CONFIG['lag_check_interval'])
+    checks['read_uses_replica'] = served_by(read_only=True) != primary
+
+    name = f"Replica Check {time.time():.0f}"
+    success, message = app.add_patient(name, 40, "Other", "")
+    if not success:
+        sys.exit(message)
+    checks['write_uses_primary'] = served_by(read_only=False) == primary
+    checks['read_after_write_sees_write'] = patient_visible(name)
+    if app.get_replica_set().last_write_gtids is None:
+        # Without GTIDs the replica cannot prove it has the write
+        checks['read_after_write_uses_primary'] = served_by(read_only=True) == primary
+
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline and served_by(read_only=True) == primary:
+        time.sleep(0.5)
+    checks['read_returns_to_replica'] = served_by(read_only=True) != primary
+    checks['replica_has_write'] = patient_visible(name)
+
+    print(json.dumps({'checks': checks, 'routing': app.get_replica_set().stats()}, indent=2))
+    if not all(checks.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Shared helpers for the benchmark scripts
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+
+import app
+
+# Streamlit warns about missing script contexts when used outside `streamlit run`
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+# Point the app at a scratch database and bring its schema up to date
+def use_database(database, pool_size=None):
+    config = dict(app.DB_CONFIG)
+    config.pop('database', None)
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE DATABASE IF NOT EXISTS `{database}`')
+    cursor.close()
+    conn.close()
+
+    app.DB_CONFIG['database'] = database
+    if pool_size:
+        app.DB_POOL_CONFIG['pool_size'] = pool_size
+    app.get_connection_pool.clear()
+    if not app.init_db():
+        sys.exit("Could not apply migrations to the benchmark database")
+
+# Summarise a list of latencies in milliseconds
+def summarise(timings):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3)
+    }
+
+# Run `func` `repeats` times; returns the latency summary and the last result
+def time_call(func, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarise(timings), result
@@ -0,0 +1,69 @@
+# Benchmark the admission forecaster on synthetic hourly counts.
+#
+#   python benchmarks/forecast_benchmark.py --wards 300 --years 3
+#
+# Builds hourly admission counts for many wards over several years, with
+# weekly and daily seasonality and a slow trend, in the (series, hour_offset,
+# admissions) form get_demand_forecast() reads from the database, then times
+# app.forecast_demand() on them. No database is needed. Results are printed
+# as JSON together with the mean absolute error of the 24-hour forecast
+# against the held-out final day.
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common import app, time_call
+
+# Poisson admissions per (ward, hour): ward size x weekday x hour-of-day x trend
+def synthetic_counts(wards, days, seed):
+    rng = np.random.default_rng(seed)
+    hours = np.arange(days * 24)
+    weekday = (hours // 24) % 7
+    hour_of_day = hours % 24
+    daily_shape = 1 + 0.8 * np.sin((hour_of_day - 8) / 24 * 2 * np.pi)
+    weekly_shape = np.where(weekday >= 5, 0.6, 1.1)
+    trend = 1 + 0.3 * hours / len(hours)
+    ward_size = rng.uniform(0.05, 1.5, size=wards)
+    rates = ward_size[:, None] * (daily_shape * weekly_shape * trend)[None, :]
+    counts = rng.poisson(rates)
+    series, offset = np.nonzero(counts)
+    return pd.DataFrame({
+        'series': np.char.add('Ward ', series.astype(str)),
+        'hour_offset': offset,
+        'admissions': counts[series, offset]
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Time forecast_demand on synthetic admission history")
+    parser.add_argument('--wards', type=int, default=300)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    days = int(args.years * 365)
+    start = datetime(2020, 1, 6)  # a Monday, so weekday 0 lines up with the synthetic data
+    counts = synthetic_counts(args.wards, days + 1, args.seed)
+    history = counts[counts['hour_offset'] < days * 24]
+    now = start + timedelta(days=days)
+
+    smoothing = app.FORECAST_CONFIG['smoothing']
+    summary, expected = time_call(lambda: app.forecast_demand(history, start, days, now, smoothing=smoothing),
+                                  args.repeats)
+    actual = (counts[counts['hour_offset'] >= days * 24].groupby('series')['admissions'].sum()
+              .reindex(expected.index, fill_value=0))
+    predicted = expected.iloc[:, :24].sum(axis=1)
+    print(json.dumps({
+        'wards': args.wards,
+        'history_days': days,
+        'count_rows': len(history),
+        'forecast_demand': summary,
+        'next_24h_mean_absolute_error': round(float((predicted - actual).abs().mean()), 2),
+        'next_24h_mean_admissions': round(float(actual.mean()), 2)
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
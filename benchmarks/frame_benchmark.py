@@ -0,0 +1,85 @@
+# Benchmark building DataFrames from query results: dict rows vs columnar fetch.
+#
+#   python benchmarks/frame_benchmark.py --patients 1000000
+#   python benchmarks/frame_benchmark.py --skip-load
+#
+# Compares the list-of-dicts path (get_patients() / get_assignments() then
+# pd.DataFrame) with the chunked columnar path (read_frame() over the same
+# queries). Reports median time, peak Python memory traced during the
+# conversion and the resulting DataFrame size, as JSON.
+import argparse
+import json
+import tracemalloc
+
+import pandas as pd
+
+from common import app, time_call, use_database
+from synthetic import generate_hospital
+
+# The previous path: dict rows, then a DataFrame over them
+def dict_patients():
+    return pd.DataFrame(app.get_patients.uncached())
+
+def dict_assignments():
+    return pd.DataFrame(app.get_assignments.uncached())
+
+# The same results through the columnar path
+def columnar_patients():
+    return app.read_frame('SELECT * FROM patients')
+
+def columnar_assignments():
+    return app.read_frame('''
+        SELECT a.assignment_id, p.name as patient_name, b.bed_id, b.ward, d.name as doctor_name, a.assignment_date
+        FROM assignments a
+        JOIN patients p ON a.patient_id = p.patient_id
+        JOIN beds b ON a.bed_id = b.bed_id
+        JOIN doctors d ON a.doctor_id = d.doctor_id
+    ''')
+
+CASES = {
+    'patients_dict_rows': dict_patients,
+    'patients_columnar': columnar_patients,
+    'assignments_dict_rows': dict_assignments,
+    'assignments_columnar': columnar_assignments
+}
+
+# Peak memory allocated by one call, in MiB; the pool is warmed beforehand so
+# connection setup is not counted
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        df = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2 ** 20, 1), df
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict-row and columnar DataFrame construction")
+    parser.add_argument('--database', default='hospital_bench', help="scratch database to use")
+    parser.add_argument('--patients', type=int, default=1000000)
+    parser.add_argument('--assignments', type=int, default=500000)
+    parser.add_argument('--repeats', type=int, default=3, help="timed runs per case")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-load', action='store_true', help="reuse the data already in the database")
+    args = parser.parse_args()
+
+    use_database(args.database)
+    if not args.skip_load:
+        conn = app.get_db_connection()
+        # Enough beds (5% go to maintenance) for every assignment to be current
+        generate_hospital(conn, beds=args.assignments + args.assignments // 5, patients=args.patients,
+                          assignments=args.assignments, seed=args.seed)
+        conn.close()
+
+    results = {}
+    for name, func in CASES.items():
+        peak_mib, df = peak_memory(func)
+        summary, _ = time_call(func, args.repeats)
+        results[name] = dict(summary, rows=len(df), peak_traced_mib=peak_mib,
+                             frame_mib=round(df.memory_usage(deep=True).sum() / 2 ** 20, 1))
+        del df
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Benchmark suite for the data-access layer in app.py.
+#
+#   python benchmarks/run_benchmarks.py --patients 100000 --output results.json
+#   python benchmarks/run_benchmarks.py --skip-load        # reuse loaded data
+#
+# Loads a deterministic synthetic hospital into a scratch MySQL database,
+# times every data-access function and emits the results as JSON so that
+# releases can be compared. The schema is MySQL-specific (FULLTEXT indexes,
+# ENUM columns, advisory locks), so there is no SQLite mode.
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+from common import app, time_call, use_database
+from synthetic import admission_candidates, generate_hospital
+
+# Count rows so that --skip-load runs still record what they measured
+def dataset_size():
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    sizes = {}
+    for table in ('patients', 'doctors', 'beds', 'assignments'):
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        sizes[table] = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return sizes
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# (patient id, doctor id) pairs for assignment_cycle, taken from the loaded
+# data on first use and rotated so repeats do not all touch one patient row
+ADMISSION_PAIRS = []
+
+def next_admission():
+    if not ADMISSION_PAIRS:
+        conn = app.get_db_connection()
+        patient_ids, doctor_ids = admission_candidates(conn)
+        conn.close()
+        ADMISSION_PAIRS.append(itertools.cycle(zip(patient_ids, itertools.cycle(doctor_ids))))
+    return next(ADMISSION_PAIRS[0])
+
+# Admit, discharge and clean one bed so the data set is left unchanged
+def assignment_cycle():
+    bed_id = app.get_available_beds()[0]['bed_id']
+    patient_id, doctor_id = next_admission()
+    result = app.admit_patient(patient_id, bed_id, doctor_id)
+    if result['error']:
+        raise RuntimeError(result['error'])
+    success, message = app.delete_assignment(result['assignment_id'])
+    if not success:
+        raise RuntimeError(message)
+    success, message = app.complete_cleaning(bed_id)
+    if not success:
+        raise RuntimeError(message)
+
+def cold_dashboard_metrics():
+    return app.get_dashboard_metrics.uncached()
+
+def reconcile_bed_index():
+    return app.get_bed_index().reconcile()
+
+# The Dashboard loads, uncached, one after another and side by side
+DASHBOARD_LOADS = [
+    app.get_dashboard_metrics.uncached,
+    app.get_demand_forecast.uncached
+]
+
+def dashboard_loads_sequential():
+    return [call() for call in DASHBOARD_LOADS]
+
+def dashboard_loads_concurrent():
+    return app.run_concurrently(*DASHBOARD_LOADS)
+
+# Named benchmark cases: (callable, result size function)
+CASES = {
+    'get_patients': (app.get_patients.uncached, len),
+    'get_patients_cached': (app.get_patients, len),
+    'get_doctors': (app.get_doctors.uncached, len),
+    'get_beds': (app.get_beds.uncached, len),
+    'get_assignments': (app.get_assignments.uncached, len),
+    'get_patients_page': (lambda: app.fetch_page('patients'), lambda page: len(page.rows)),
+    'get_patients_page_by_name': (lambda: app.fetch_page('patients', sort='name'), lambda page: len(page.rows)),
+    'get_assignments_page': (lambda: app.fetch_page('assignments'), lambda page: len(page.rows)),
+    'bed_index_reconcile': (reconcile_bed_index, lambda result: None),
+    'get_available_beds': (app.get_available_beds, len),
+    'search_patient': (lambda: app.search_data("Patient", "smith"), len),
+    'search_patient_prefix': (lambda: app.search_data("Patient", "jo"), len),
+    'search_doctor': (lambda: app.search_data("Doctor", "cardio"), len),
+    'search_bed': (lambda: app.search_data("Bed", "icu"), len),
+    'dashboard_metrics_cold': (cold_dashboard_metrics, lambda result: len(result['wards'])),
+    'dashboard_metrics_cached': (app.get_dashboard_metrics, lambda result: len(result['wards'])),
+    'dashboard_loads_sequential': (dashboard_loads_sequential, len),
+    'dashboard_loads_concurrent': (dashboard_loads_concurrent, len),
+    'create_delete_assignment': (assignment_cycle, lambda result: None)
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the app's data-access functions on synthetic data")
+    parser.add_argument('--database', default='hospital_bench', help="scratch database to use")
+    parser.add_argument('--wards', type=int, default=12)
+    parser.add_argument('--beds', type=int, default=2000)
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--assignments', type=int, default=50000,
+                        help="stays to load; those beyond the free beds are archived")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs per case")
+    parser.add_argument('--only', nargs='*', choices=list(CASES), help="run only these cases")
+    parser.add_argument('--skip-load', action='store_true', help="reuse the data already in the database")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    use_database(args.database)
+    if not args.skip_load:
+        conn = app.get_db_connection()
+        generate_hospital(conn, args.wards, args.beds, args.doctors, args.patients, args.assignments, seed=args.seed)
+        conn.close()
+        app._bed_index().reconcile()  # loaded outside the change feed
+        app.invalidate_cache()
+
+    results = {}
+    for name in args.only or CASES:
+        func, size = CASES[name]
+        func()  # warm-up: fills the pool, bed index and caches
+        summary, result = time_call(func, args.repeats)
+        results[name] = dict(summary, result_size=size(result))
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'seed': args.seed,
+        'dataset': dataset_size(),
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Benchmark patient search: leading-wildcard LIKE scan vs the indexed search.
+#
+#   python benchmarks/search_benchmark.py --patients 1000000
+#
+# Loads synthetic patients into a scratch database (created if needed) using
+# the credentials in app.DB_CONFIG, applies the app's migrations, then times
+# the old `name LIKE '%term%'` query against app.search_data(). Results are
+# printed as JSON.
+import argparse
+import json
+import random
+
+from common import app, time_call, use_database
+from synthetic import person_name
+
+SEARCH_TERMS = ["smith", "john", "patel", "garc", "meera kum", "wil"]
+
+# Top the patients table up to `count` rows with deterministic names
+def load_patients(count, seed, batch_size=10000):
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM patients')
+    existing = cursor.fetchone()[0]
+
+    rng = random.Random(seed)
+    for start in range(existing, count, batch_size):
+        rows = [
+            (person_name(rng), rng.randint(1, 99),
+             rng.choice(["Male", "Female", "Other"]))
+            for _ in range(min(batch_size, count - start))
+        ]
+        cursor.executemany('''
+            INSERT INTO patients (name, age, gender, admission_date)
+            VALUES (%s, %s, %s, NOW())
+        ''', rows)
+        conn.commit()
+    cursor.close()
+    conn.close()
+    return max(existing, count)
+
+def scan_search(term):
+    conn = app.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('SELECT patient_id, name, age, gender, contact, admission_date FROM patients WHERE name LIKE %s',
+                   (f'%{term}%',))
+    rows = len(cursor.fetchall())
+    cursor.close()
+    conn.close()
+    return rows
+
+def indexed_search(term):
+    return len(app.search_data("Patient", term))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LIKE scans with the indexed patient search")
+    parser.add_argument('--patients', type=int, default=1000000, help="number of patients to load")
+    parser.add_argument('--database', default='hospital_bench', help="scratch database to use")
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs per search term")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    use_database(args.database)
+    patients = load_patients(args.patients, args.seed)
+
+    results = {'patients': patients, 'limit': app.SEARCH_RESULT_LIMIT, 'terms': {}}
+    for term in SEARCH_TERMS:
+        scan, scan_rows = time_call(lambda: scan_search(term), args.repeats)
+        indexed, indexed_rows = time_call(lambda: indexed_search(term), args.repeats)
+        results['terms'][term] = {
+            'scan': dict(scan, rows=scan_rows),
+            'indexed': dict(indexed, rows=indexed_rows)
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
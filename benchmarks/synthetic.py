@@ -0,0 +1,136 @@
+# Deterministic synthetic hospital data for benchmarks.
+#
+# The same seed and counts always produce the same rows, so timings from
+# different releases are measured against identical data.
+import random
+from itertools import islice
+from datetime import datetime, timedelta
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+    "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Aarav", "Priya", "Rohit", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Meera"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Sharma", "Verma", "Gupta", "Patel", "Singh", "Kumar", "Reddy", "Iyer", "Nair", "Mehta"
+]
+WARD_NAMES = [
+    "General", "ICU", "Pediatrics", "Maternity", "Cardiology", "Orthopedics", "Oncology", "Neurology",
+    "Emergency", "Surgery", "Geriatrics", "Burns"
+]
+SPECIALTIES = [
+    "General Medicine", "Cardiology", "Orthopedics", "Pediatrics", "Neurology", "Oncology", "Obstetrics",
+    "Emergency Medicine", "Surgery", "Pulmonology"
+]
+
+# Tables emptied before a load
+HOSPITAL_TABLES = ['assignments', 'beds', 'doctors', 'patients', 'bed_events', 'occupancy_events', 'occupancy_hourly',
+                   'assignment_history', 'patient_history']
+
+# Rows per multi-row INSERT while loading
+LOAD_BATCH_SIZE = 5000
+
+# Epoch for generated timestamps; fixed so that reruns produce identical rows
+BASE_TIME = datetime(2024, 1, 1)
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def ward_names(count):
+    return [WARD_NAMES[i] if i < len(WARD_NAMES) else f"{WARD_NAMES[i % len(WARD_NAMES)]} {i // len(WARD_NAMES) + 1}"
+            for i in range(count)]
+
+# Insert an iterable of rows with explicit multi-row INSERTs of LOAD_BATCH_SIZE
+# rows, so generators never have to be materialised in full
+def insert_rows(conn, cursor, insert, row_template, rows):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, LOAD_BATCH_SIZE))
+        if not batch:
+            break
+        cursor.execute(insert + ', '.join([row_template] * len(batch)), [value for row in batch for value in row])
+        conn.commit()
+
+# Ids from the loaded data for benchmarks that admit patients: up to `limit`
+# patients with no current assignment and up to `limit` doctors
+def admission_candidates(conn, limit=100):
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT p.patient_id FROM patients p
+        WHERE NOT EXISTS (SELECT 1 FROM assignments a WHERE a.patient_id = p.patient_id)
+        ORDER BY p.patient_id LIMIT %s
+    ''', (limit,))
+    patient_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT doctor_id FROM doctors ORDER BY doctor_id LIMIT %s', (limit,))
+    doctor_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    if not patient_ids or not doctor_ids:
+        raise ValueError("The data set has no unassigned patient or no doctor to admit with")
+    return patient_ids, doctor_ids
+
+# Empty the hospital tables and load a synthetic hospital into them. At most
+# one current assignment per available bed is created (maintenance beds stay
+# empty); the rest of `assignments` becomes archived stays.
+def generate_hospital(conn, wards=12, beds=2000, doctors=200, patients=100000, assignments=50000,
+                      history_days=365, seed=42):
+    if assignments and not (patients and beds and doctors):
+        raise ValueError("Assignments need at least one patient, bed and doctor")
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    # TRUNCATE also resets AUTO_INCREMENT, so generated ids always start at 1
+    cursor.execute('SET FOREIGN_KEY_CHECKS = 0')
+    for table in HOSPITAL_TABLES:
+        cursor.execute(f'TRUNCATE TABLE {table}')
+    cursor.execute('SET FOREIGN_KEY_CHECKS = 1')
+
+    def timestamp():
+        return BASE_TIME + timedelta(seconds=rng.randrange(history_days * 86400))
+
+    names = ward_names(wards)
+    insert_rows(conn, cursor, 'INSERT INTO patients (name, age, gender, contact, admission_date) VALUES ',
+                '(%s, %s, %s, %s, %s)',
+                ((person_name(rng), rng.randint(1, 99), rng.choice(["Male", "Female", "Other"]),
+                  f"98{rng.randrange(10 ** 8):08d}", timestamp()) for _ in range(patients)))
+    insert_rows(conn, cursor, 'INSERT INTO doctors (name, specialty, contact) VALUES ', '(%s, %s, %s)',
+                ((person_name(rng), rng.choice(SPECIALTIES), f"97{rng.randrange(10 ** 8):08d}")
+                 for _ in range(doctors)))
+    insert_rows(conn, cursor, 'INSERT INTO beds (ward, status, last_cleaned) VALUES ', '(%s, %s, %s)',
+                ((rng.choice(names), "maintenance" if rng.random() < 0.05 else "available", timestamp())
+                 for _ in range(beds)))
+
+    # Every bed not under maintenance may hold one current stay, for a patient
+    # with no other; requested assignments beyond that load as discharged
+    # stays in assignment_history, numbered before the current ones
+    cursor.execute('SELECT bed_id, ward, status FROM beds ORDER BY bed_id')
+    all_beds = cursor.fetchall()
+    free_beds = [bed for bed in all_beds if bed[2] == "available"]
+    current = min(assignments, len(free_beds), patients)
+    archived = assignments - current
+
+    def history_rows():
+        for assignment_id in range(1, archived + 1):
+            bed_id, ward, _ = rng.choice(all_beds)
+            admitted = timestamp()
+            yield (assignment_id, rng.randint(1, patients), bed_id, ward, rng.randint(1, doctors), admitted,
+                   admitted + timedelta(hours=rng.randint(12, 14 * 24)))
+
+    insert_rows(conn, cursor, '''INSERT INTO assignment_history (assignment_id, patient_id, bed_id, ward, doctor_id,
+                                                        assignment_date, discharge_date) VALUES ''',
+                '(%s, %s, %s, %s, %s, %s, %s)', history_rows())
+    occupied = sorted(bed[0] for bed in rng.sample(free_beds, current))
+    insert_rows(conn, cursor,
+                'INSERT INTO assignments (assignment_id, patient_id, bed_id, doctor_id, assignment_date) VALUES ',
+                '(%s, %s, %s, %s, %s)',
+                ((archived + i, patient_id, bed_id, rng.randint(1, doctors), timestamp())
+                 for i, (bed_id, patient_id) in enumerate(zip(occupied, rng.sample(range(1, patients + 1), current)),
+                                                          start=1)))
+    for start in range(0, len(occupied), LOAD_BATCH_SIZE):
+        batch = occupied[start:start + LOAD_BATCH_SIZE]
+        cursor.execute(f'UPDATE beds SET status = "occupied" WHERE bed_id IN ({", ".join(["%s"] * len(batch))})',
+                       batch)
+        conn.commit()
+    cursor.close()
+    return {'wards': wards, 'beds': beds, 'doctors': doctors, 'patients': patients,
+            'assignments': current, 'archived_stays': archived, 'history_days': history_days, 'seed': seed}
@@ -0,0 +1,49 @@
+# Export patients, beds or assignments to a CSV or Parquet file.
+#
+#   python export_data.py patients patients.csv.gz
+#   python export_data.py assignments assignments.parquet --compression zstd
+#
+# Rows are streamed from the database in fixed-size chunks, so memory use
+# stays flat however large the table is. The format and CSV compression are
+# taken from the file name unless given explicitly.
+import argparse
+import logging
+import sys
+
+import app
+
+# Streamlit warns about missing script contexts when used outside `streamlit run`
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+# Format and compression implied by a file name such as beds.csv.gz
+def guess_format(path):
+    name = path.lower()
+    compression = 'gzip' if name.endswith('.gz') else 'zstd' if name.endswith('.zst') else None
+    if compression:
+        name = name.rsplit('.', 1)[0]
+    return ('parquet' if name.endswith('.parquet') else 'csv'), compression
+
+def main():
+    parser = argparse.ArgumentParser(description="Export records from the hospital database")
+    parser.add_argument('table', choices=list(app.EXPORT_SPECS))
+    parser.add_argument('path', help="output file")
+    parser.add_argument('--format', choices=app.EXPORT_FORMATS, help="default: from the file name")
+    parser.add_argument('--compression', choices=['none', 'gzip', 'zstd'], help="default: from the file name")
+    parser.add_argument('--chunk-size', type=int, default=app.EXPORT_CHUNK_SIZE,
+                        help="rows per fetch and per Parquet row group")
+    args = parser.parse_args()
+
+    fmt, compression = guess_format(args.path)
+    fmt = args.format or fmt
+    if args.compression:
+        compression = None if args.compression == 'none' else args.compression
+
+    try:
+        with open(args.path, 'wb') as file:
+            rows = app.export_table(args.table, file, fmt, compression, args.chunk_size)
+    except (ImportError, app.mysql.connector.Error) as err:
+        sys.exit(f"Export failed: {err}")
+    print(f"Exported {rows} {args.table} to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Bulk import patients, doctors or beds from a CSV or Parquet file.
+#
+#   python import_data.py patients admissions.csv
+#   python import_data.py beds beds.parquet --batch-size 5000
+#
+# Rows are validated with the same rules as the app's add_* helpers and
+# written in batched multi-row INSERTs; rejected rows are listed at the end.
+import argparse
+import logging
+import sys
+
+import app
+
+# Streamlit warns about missing script contexts when used outside `streamlit run`
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import records into the hospital database")
+    parser.add_argument('table', choices=list(app.IMPORT_SPECS))
+    parser.add_argument('path', help="CSV or Parquet file")
+    parser.add_argument('--batch-size', type=int, default=app.IMPORT_BATCH_SIZE,
+                        help="rows per INSERT and per transaction")
+    args = parser.parse_args()
+
+    with open(args.path, 'rb') as file:
+        report = app.bulk_import(args.table, app.iter_import_records(file, args.path), args.batch_size)
+
+    print(f"Imported {report['imported']} {args.table}, rejected {report['failed']} rows")
+    for error in report['errors']:
+        print(f"  row {error['row']}: {error['error']}")
+    if report['failed'] > len(report['errors']):
+        print(f"  ... {report['failed'] - len(report['errors'])} more errors not shown")
+    sys.exit(1 if report['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Grant, revoke or list administrator rights.
+#
+#   python manage_admins.py grant alice@example.com
+#   python manage_admins.py revoke alice@example.com
+#   python manage_admins.py list
+#
+# Administrators see the Diagnostics page and can run the archiver by hand.
+# Registration never grants the right, so it is given here by someone with
+# access to the server.
+import argparse
+import logging
+import sys
+
+import app
+
+# Streamlit warns about missing script contexts when used outside `streamlit run`
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage administrator accounts")
+    parser.add_argument('action', choices=['grant', 'revoke', 'list'])
+    parser.add_argument('username', nargs='?', help="account email (grant and revoke)")
+    args = parser.parse_args()
+
+    if not app.init_db():
+        sys.exit("Could not connect to the database or apply migrations")
+    if args.action == 'list':
+        for username in app.get_admins():
+            print(username)
+        return
+    if not args.username:
+        parser.error(f"{args.action} needs a username")
+    success, message = app.set_admin(args.username, args.action == 'grant')
+    if not success:
+        sys.exit(message)
+    print(message)
+
+if __name__ == "__main__":
+    main()